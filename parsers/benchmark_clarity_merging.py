@@ -0,0 +1,97 @@
+import argparse
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from parsers.clarity_parser import ClarityDetailReader, ClarityJurisdiction, ResultAccumulator
+
+
+BENCHMARK_RESULT_COUNT = 100000
+CONTEST_COUNT = 25
+CHOICES_PER_CONTEST = 4
+VOTE_TYPES = ('Election Day', 'Absentee', 'Mail-in', 'Provisional')
+KEY_FIELDS = ('county', 'precinct', 'office', 'district', 'party', 'candidate')
+
+
+def write_synthetic_detail_xml(filename, result_count):
+    # enough precincts for `result_count` precinct level choice results
+    precinct_count = max(result_count // (CONTEST_COUNT * CHOICES_PER_CONTEST * len(VOTE_TYPES)), 1)
+    precincts = [f'Precinct {i:05}' for i in range(precinct_count)]
+    with open(filename, 'w') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<ElectionResult>\n<Region>Synthetic</Region>\n')
+        f.write('<VoterTurnout totalVoters="0" ballotsCast="0" voterTurnout="0"><Precincts>\n')
+        for precinct in precincts:
+            f.write(f'<Precinct name="{precinct}" totalVoters="100" ballotsCast="50"/>\n')
+        f.write('</Precincts></VoterTurnout>\n')
+        for contest in range(CONTEST_COUNT):
+            f.write(f'<Contest key="{contest}" text="Office {contest}, District {contest}">\n')
+            for choice in range(CHOICES_PER_CONTEST):
+                f.write(f'<Choice key="{contest}-{choice}" text="Candidate {choice}" party="DEM" totalVotes="0">\n')
+                for vote_type in VOTE_TYPES:
+                    f.write(f'<VoteType name="{vote_type}" votes="0">\n')
+                    for i, precinct in enumerate(precincts):
+                        f.write(f'<Precinct name="{precinct}" votes="{(i + choice) % 97}"/>\n')
+                    f.write('</VoteType>\n')
+                f.write('</Choice>\n')
+            f.write('</Contest>\n')
+        f.write('</ElectionResult>\n')
+
+
+def read_results(filename):
+    reader = ClarityDetailReader(filename)
+    results = []
+    for result in reader:
+        if isinstance(result, ClarityJurisdiction) or result.choice is None or result.precinct is None:
+            continue
+        row = {'county': reader.region, 'precinct': result.precinct, 'office': result.contest,
+               'district': '', 'party': result.party, 'candidate': result.choice}
+        results.append((row, result.vote_type, result.votes))
+    return results
+
+
+def merge_with_list_scan(results):
+    # the linear search clarity_parser used before rows were indexed
+    rows = []
+    for row, vote_type, votes in results:
+        r = [x for x in rows if x['county'] == row['county'] and x['precinct'] == row['precinct'] and
+             x['office'] == row['office'] and x['district'] == row['district'] and
+             x['party'] == row['party'] and x['candidate'] == row['candidate']]
+        if r:
+            r[0][vote_type] = votes
+        else:
+            rows.append({**row, vote_type: votes})
+    return rows
+
+
+def merge_with_accumulator(results):
+    rows = ResultAccumulator(KEY_FIELDS)
+    for row, vote_type, votes in results:
+        rows.add(dict(row), vote_type, votes)
+    return list(rows)
+
+
+def time_merge(name, merge, results):
+    start_time = perf_counter()
+    rows = merge(results)
+    seconds = perf_counter() - start_time
+    print(f'{name}: merged {len(results)} results into {len(rows)} rows in {seconds:.2f}s')
+    return rows, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare list scan and indexed merging of Clarity results')
+    parser.add_argument('--results', type=int, default=BENCHMARK_RESULT_COUNT)
+    parser.add_argument('--skip-list-scan', action='store_true', help='the list scan is quadratic and takes minutes')
+    args = parser.parse_args()
+    with TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, 'detail.xml')
+        write_synthetic_detail_xml(filename, args.results)
+        results = read_results(filename)
+    rows, accumulator_seconds = time_merge('ResultAccumulator', merge_with_accumulator, results)
+    if not args.skip_list_scan:
+        list_scan_rows, list_scan_seconds = time_merge('list scan', merge_with_list_scan, results)
+        assert list_scan_rows == rows, 'merged rows differ'
+        print(f'speed-up: {list_scan_seconds / accumulator_seconds:.0f}x')
+
+
+if __name__ == "__main__":
+    main()
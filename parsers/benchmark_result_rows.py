@@ -0,0 +1,72 @@
+import argparse
+import os
+import tracemalloc
+from time import perf_counter
+from parsers.output_sinks import CSVSink
+from parsers.pa_pdf_parser import ResultRow
+
+
+BENCHMARK_ROW_COUNT = 200000
+BENCHMARK_HEADER = ['county', 'precinct', 'office', 'district', 'party', 'candidate',
+                   'election_day', 'absentee', 'mail_in', 'provisional', 'votes']
+VOTE_COLUMNS = ['votes', 'election_day', 'absentee', 'mail_in', 'provisional']
+
+
+def build_dict_row(i):
+    row = {'county': 'Adams',
+           'precinct': f'Precinct {i // 50}',
+           'office': 'PRESIDENT OF THE UNITED STATES',
+           'party': 'DEM',
+           'district': '',
+           'candidate': f'CANDIDATE {i % 50}'}
+    return row
+
+
+def build_result_row(i):
+    return ResultRow(county='Adams',
+                     precinct=f'Precinct {i // 50}',
+                     office='PRESIDENT OF THE UNITED STATES',
+                     party='DEM',
+                     district='',
+                     candidate=f'CANDIDATE {i % 50}')
+
+
+def parse_rows(build_row, row_count):
+    # mirrors the electionware table parser: build, clean, then populate votes
+    rows = []
+    for i in range(row_count):
+        row = build_row(i)
+        row['office'] = 'President'
+        row['candidate'] = row['candidate'].title()
+        for offset, header in enumerate(VOTE_COLUMNS):
+            row[header] = i + offset
+        rows.append(row)
+    return rows
+
+
+def benchmark(name, build_row, row_count):
+    tracemalloc.start()
+    start_time = perf_counter()
+    rows = parse_rows(build_row, row_count)
+    parse_seconds = perf_counter() - start_time
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start_time = perf_counter()
+    with CSVSink(os.devnull, BENCHMARK_HEADER) as csv_writer:
+        csv_writer.writeheader()
+        csv_writer.writerows(rows)
+    write_seconds = perf_counter() - start_time
+    print(f'{name}: parse {parse_seconds:.3f}s, write {write_seconds:.3f}s, '
+          f'peak {peak_bytes / row_count:.0f} bytes/row ({peak_bytes / 1024 / 1024:.1f} MB)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare dict rows with slotted ResultRow rows')
+    parser.add_argument('--rows', type=int, default=BENCHMARK_ROW_COUNT)
+    args = parser.parse_args()
+    benchmark('dict', build_dict_row, args.rows)
+    benchmark('ResultRow', build_result_row, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+from parsers.electionware_parser import INSTRUCTION_ROW_PREFIX, VOTE_PERCENT_HEADER
+from parsers.pa_pdf_parser import RenderedPDFPage
+import parsers.pa_adams_primary_2020_results_parser as adams
+import parsers.pa_beaver_primary_2020_results_parser as beaver
+import parsers.pa_cambria_primary_2020_results_parser as cambria
+import parsers.pa_centre_primary_2020_results_parser as centre
+import parsers.pa_chester_primary_2020_results_parser as chester
+import parsers.pa_clearfield_primary_2020_results_parser as clearfield
+import parsers.pa_clinton_primary_2020_results_parser as clinton
+import parsers.pa_lackawanna_primary_2020_results_parser as lackawanna
+import parsers.pa_lebanon_primary_2020_results_parser as lebanon
+import parsers.pa_mifflin_primary_2020_results_parser as mifflin
+import parsers.pa_northampton_primary_2020_results_parser as northampton
+import parsers.pa_washington_primary_2020_results_parser as washington
+
+
+PRECINCT = 'Precinct 9'
+STATISTICS = 'STATISTICS'
+
+
+def build_page(header, table_header, tables, footer_substring, has_vote_percent_header=False):
+    # `tables` is a list of (raw office, rows) with each row's strings as they
+    # appear in the report, i.e. the candidate, its votes and any vote %
+    strings = list(header) + [PRECINCT]
+    for office, rows in tables:
+        strings += [f'{INSTRUCTION_ROW_PREFIX} 1', office]
+        if has_vote_percent_header and office != STATISTICS:
+            strings.append(VOTE_PERCENT_HEADER)
+        strings += table_header
+        for row in rows:
+            strings += row
+    strings.append(footer_substring)
+    return RenderedPDFPage(1, strings)
+
+
+def expected_row(county, office, district, party, candidate, **votes):
+    return dict(county=county, precinct=PRECINCT, office=office, district=district, party=party,
+                candidate=candidate, **votes)
+
+
+def check_county(name, pdf_page_parser_clazz, page, expected_rows):
+    rows = [row._asdict() for row in pdf_page_parser_clazz(page)]
+    assert rows == expected_rows, f'{name} parsed {rows}'
+    print(f'{name}: {len(rows)} rows ok')
+
+
+def check_county_rejects(name, pdf_page_parser_clazz, page):
+    try:
+        list(pdf_page_parser_clazz(page))
+    except AssertionError:
+        print(f'{name}: rejected ok')
+        return
+    raise AssertionError(f'{name} parsed an invalid page')
+
+
+def check_clinton():
+    # a county that still subclasses the shared parsers
+    page = build_page(clinton.CLINTON_HEADER, clinton.TABLE_HEADER, [
+        ('PRESIDENT OF THE UNITED STATES', [
+            ['JOE BIDEN', '1,204', '1,204'],
+            ['Write-In: JANE DOE', '3', '3'],
+            ['Write-In Totals', '3', '3'],
+            ['Total Votes Cast', '1,207', '1,207'],
+        ]),
+        ('DEM Delegate to the National Convention', [
+            ['JOHN SMITH', '9', '9'],
+        ]),
+    ], clinton.FIRST_FOOTER_SUBSTRING)
+    check_county('Clinton', clinton.ClintonPDFPageParser, page, [
+        expected_row('Clinton', 'President', '', '', 'Joe Biden', votes=1204),
+        expected_row('Clinton', 'President', '', '', 'Write-In', votes=3),
+    ])
+
+
+def check_adams():
+    # required vote % column, except on the contest totals
+    page = build_page(adams.ADAMS_HEADER, adams.TABLE_HEADER, [
+        ('DEM President of the United States', [
+            ['JOE BIDEN', '1,204', '1,100', '104', '99.75%'],
+            ['Write-In Totals', '3', '2', '1', '0.25%'],
+            ['Contest Totals', '1,207', '1,102', '105'],
+        ]),
+        ('REP Rep in Congress - 13th Dist', [
+            ['JOHN JOYCE', '880', '800', '80', '100.00%'],
+        ]),
+    ], adams.FIRST_FOOTER_SUBSTRING, has_vote_percent_header=True)
+    check_county('Adams', adams.AdamsPDFPageParser, page, [
+        expected_row('Adams', 'President', '', 'DEM', 'JOE BIDEN', votes=1204, election_day=1100, absentee=104),
+        expected_row('Adams', 'President', '', 'DEM', 'Write-in', votes=3, election_day=2, absentee=1),
+        expected_row('Adams', 'U.S. House', 13, 'REP', 'JOHN JOYCE', votes=880, election_day=800, absentee=80),
+    ])
+
+
+def check_beaver():
+    # offices containing 'Del ' or 'Comm' are skipped after title casing
+    page = build_page(beaver.BEAVER_HEADER, beaver.TABLE_HEADER, [
+        ('DEM PRESIDENT OF THE UNITED STATES', [
+            ['JOE BIDEN', '120'],
+            ['Write-In Totals', '2'],
+            ['Total Votes Cast', '122'],
+        ]),
+        ('DEM DEL TO THE NATIONAL CONVENTION 17TH DIST', [
+            ['JANE ROE', '40'],
+        ]),
+        ('REP MEMBER OF STATE COMMITTEE', [
+            ['JOHN DOE', '31'],
+        ]),
+        ('REP SEN IN THE GENERAL ASSEMBLY 47TH DIST', [
+            ['ELDER VOGEL JR', '77'],
+        ]),
+    ], beaver.FIRST_FOOTER_SUBSTRING)
+    check_county('Beaver', beaver.BeaverPDFPageParser, page, [
+        expected_row('Beaver', 'President', '', 'DEM', 'Joe Biden', votes=120),
+        expected_row('Beaver', 'President', '', 'DEM', 'Write-In', votes=2),
+        expected_row('Beaver', 'State Senate', 47, 'REP', 'Elder Vogel Jr', votes=77),
+    ])
+
+
+def check_cambria():
+    # both orders of the table header strings
+    page = build_page(cambria.CAMBRIA_HEADER, cambria.TABLE_HEADER, [
+        ('REP REPRESENTATIVE IN CONGRESS 13TH DISTRICT', [
+            ['JOHN JOYCE', '410', '300', '105', '5'],
+        ]),
+    ], cambria.FIRST_FOOTER_SUBSTRING)
+    variant_page = build_page(cambria.CAMBRIA_HEADER, cambria.TABLE_HEADER_VARIANT, [
+        ('DEM GENERAL ASSEMBLY 72ND DISTRICT', [
+            ['FRANK BURNS', '512', '400', '110', '2'],
+        ]),
+    ], cambria.FIRST_FOOTER_SUBSTRING)
+    check_county('Cambria', cambria.CambriaPDFPageParser, page, [
+        expected_row('Cambria', 'U.S. House', 13, 'REP', 'John Joyce',
+                     votes=410, election_day=300, mail_in=105, provisional=5),
+    ])
+    check_county('Cambria (header variant)', cambria.CambriaPDFPageParser, variant_page, [
+        expected_row('Cambria', 'General Assembly', 72, 'DEM', 'Frank Burns',
+                     votes=512, election_day=400, mail_in=110, provisional=2),
+    ])
+
+
+def check_centre():
+    # optional vote % column: only some rows have one
+    page = build_page(centre.CENTRE_HEADER, centre.TABLE_HEADER, [
+        ('DEM PRESIDENT OF THE UNITED STATES', [
+            ['JOE BIDEN', '300', '96.15%'],
+            ['Write-In Totals', '12', '3.85%'],
+            ['Total Votes Cast', '312'],
+        ]),
+        ('REP REPRESENTATIVE IN CONGRESS 12TH CONGRESSIONAL', [
+            ['FRED KELLER', '250'],
+        ]),
+    ], centre.FIRST_FOOTER_SUBSTRING, has_vote_percent_header=True)
+    check_county('Centre', centre.CentrePDFPageParser, page, [
+        expected_row('Centre', 'President', '', 'DEM', 'Joe Biden', votes=300),
+        expected_row('Centre', 'President', '', 'DEM', 'Write-In', votes=12),
+        expected_row('Centre', 'U.S. House', 12, 'REP', 'Fred Keller', votes=250),
+    ])
+
+
+def check_chester():
+    # optional vote % column, with council and liquor questions skipped
+    page = build_page(chester.CHESTER_HEADER, chester.TABLE_HEADER_VARIANT, [
+        ('REP SENATOR IN THE GENERAL ASSEMBLY 19TH DISTRICT', [
+            ['KEVIN RUNEY', '95', '60', '35', '100.00%'],
+            ['Total Votes Cast', '95', '60', '35'],
+        ]),
+        ('Borough Council Question', [
+            ['Yes', '10', '5', '5', '50.00%'],
+        ]),
+        ('Liquor License Question', [
+            ['No', '4', '2', '2'],
+        ]),
+    ], chester.FIRST_FOOTER_SUBSTRING, has_vote_percent_header=True)
+    check_county('Chester', chester.ChesterPDFPageParser, page, [
+        expected_row('Chester', 'State Senate', 19, 'REP', 'Kevin Runey', votes=95, election_day=60, absentee=35),
+    ])
+
+
+def check_clearfield():
+    # individual write-ins are skipped in favour of the write-in totals
+    page = build_page(clearfield.CLEARFIELD_HEADER, clearfield.TABLE_HEADER, [
+        ('REP REPRESENTATIVE IN THE GENERAL ASSEMBLY HOUSE 73RD', [
+            ['TOMMY SANKEY', '222'],
+            ['Write-In: JOHN Q PUBLIC', '1'],
+            ['Write-In Totals', '1'],
+        ]),
+        ('DEM MEMBER OF DEMOCRATIC COUNTY COMMITTEE', [
+            ['JANE ROE', '18'],
+        ]),
+    ], clearfield.FIRST_FOOTER_SUBSTRING)
+    check_county('Clearfield', clearfield.ClearfieldPDFPageParser, page, [
+        expected_row('Clearfield', 'General Assembly', 73, 'REP', 'Tommy Sankey', votes=222),
+        expected_row('Clearfield', 'General Assembly', 73, 'REP', 'Write-In', votes=1),
+    ])
+
+
+def check_lackawanna():
+    # offices are title cased, candidates are not
+    page = build_page(lackawanna.LACKAWANNA_HEADER, lackawanna.TABLE_HEADER, [
+        ('DEM AUDITOR GENERAL', [
+            ['NINA AHMAD', '140', '100', '30', '8', '2'],
+            ['Write-In Totals', '1', '1', '0', '0', '0'],
+        ]),
+        ('REP CONGRESS 8TH DISTRICT', [
+            ['JIM BOGNET', '90', '70', '15', '5', '0'],
+        ]),
+    ], lackawanna.FIRST_FOOTER_SUBSTRING)
+    votes = ('votes', 'election_day', 'mail_in', 'absentee', 'provisional')
+    check_county('Lackawanna', lackawanna.LackawannaPDFPageParser, page, [
+        expected_row('Lackawanna', 'Auditor General', '', 'DEM', 'NINA AHMAD',
+                     **dict(zip(votes, (140, 100, 30, 8, 2)))),
+        expected_row('Lackawanna', 'Auditor General', '', 'DEM', 'Write-in',
+                     **dict(zip(votes, (1, 1, 0, 0, 0)))),
+        expected_row('Lackawanna', 'U.S. House', 8, 'REP', 'JIM BOGNET', **dict(zip(votes, (90, 70, 15, 5, 0)))),
+    ])
+
+
+def check_lebanon():
+    # required vote % column on every row except the statistics
+    page = build_page(lebanon.LEBANON_HEADER, [lebanon.TABLE_HEADER], [
+        (STATISTICS, [
+            ['Registered Voters - Total', '1,500'],
+            ['Ballots Cast - Total', '600'],
+        ]),
+        ('REP REPRESENTIVE IN CONGRESS 9TH DISTRICT', [
+            ['DAN MEUSER', '410', '99.03%'],
+            ['Write-In Totals', '4', '0.97%'],
+            ['Total Votes Cast', '414', '100.00%'],
+        ]),
+        ('REP Member of County Committee', [
+            ['JOHN DOE', '12', '100.00%'],
+        ]),
+    ], lebanon.FIRST_FOOTER_SUBSTRING, has_vote_percent_header=True)
+    check_county('Lebanon', lebanon.LebanonPDFPageParser, page, [
+        expected_row('Lebanon', 'Registered Voters', '', '', '', votes=1500),
+        expected_row('Lebanon', 'Ballots Cast', '', '', '', votes=600),
+        expected_row('Lebanon', 'U.S. House', 9, 'REP', 'Dan Meuser', votes=410),
+        expected_row('Lebanon', 'U.S. House', 9, 'REP', 'Write-In', votes=4),
+    ])
+    page_missing_vote_percent = build_page(lebanon.LEBANON_HEADER, [lebanon.TABLE_HEADER], [
+        ('REP REPRESENTIVE IN CONGRESS 9TH DISTRICT', [
+            ['DAN MEUSER', '410'],
+            ['Write-In Totals', '4', '0.97%'],
+        ]),
+    ], lebanon.FIRST_FOOTER_SUBSTRING, has_vote_percent_header=True)
+    check_county_rejects('Lebanon (missing vote %)', lebanon.LebanonPDFPageParser, page_missing_vote_percent)
+
+
+def check_mifflin():
+    # the second absentee column is not mapped
+    page = build_page(mifflin.MIFFLIN_HEADER, mifflin.TABLE_HEADER, [
+        ('REP REPRESENTATIVE IN THE GENERAL ASSEMBLY 171ST DISTRICT', [
+            ['KERRY BENNINGHOFF', '700', '600', '55', '40', '5'],
+            ['Write-In: SOMEONE', '1', '1', '0', '0', '0'],
+        ]),
+    ], mifflin.FIRST_FOOTER_SUBSTRING)
+    check_county('Mifflin', mifflin.MifflinPDFPageParser, page, [
+        expected_row('Mifflin', 'General Assembly', 171, 'REP', 'Kerry Benninghoff',
+                     votes=700, election_day=600, mail_in=40, absentee=5),
+    ])
+
+
+def check_northampton():
+    # skipped offices drop both a statistics row and a whole table
+    page = build_page(northampton.NORTHAMPTON_HEADER, northampton.TABLE_HEADER, [
+        (STATISTICS, [
+            ['Registered Voters - Total', '2,000'],
+            ['Ballots Cast - Total', '900', '500', '390', '10'],
+            ['Voter Turnout - Total', '45.00%'],
+        ]),
+        ('Library Tax Question', [
+            ['Yes', '300', '200', '95', '5'],
+        ]),
+        ('DEM Representative in Congress', [
+            ['Susan Wild', '600', '350', '245', '5'],
+        ]),
+    ], northampton.FIRST_FOOTER_SUBSTRING)
+    votes = ('votes', 'election_day', 'absentee', 'provisional')
+    check_county('Northampton', northampton.NorthamptonPDFPageParser, page, [
+        expected_row('Northampton', 'Registered Voters', '', '', '', votes=2000),
+        expected_row('Northampton', 'Ballots Cast', '', '', '', **dict(zip(votes, (900, 500, 390, 10)))),
+        expected_row('Northampton', 'U.S. House', 7, 'DEM', 'Susan Wild', **dict(zip(votes, (600, 350, 245, 5)))),
+    ])
+
+
+def check_washington():
+    # required vote % column, except on the candidates without one
+    page = build_page(washington.WASHINGTON_HEADER, washington.TABLE_HEADER_VARIANT, [
+        ('REP REPRESENTATIVE IN CONGRESS', [
+            ['GUY RESCHENTHALER', '500', '400', '90', '6', '4', '99.80%'],
+            ['Write-In: A VOTER', '1', '1', '0', '0', '0', '0.20%'],
+            ['Write-In Totals', '1', '1', '0', '0', '0', '0.20%'],
+            ['Contest Totals', '501', '401', '90', '6', '4'],
+        ]),
+    ], washington.FIRST_FOOTER_SUBSTRING, has_vote_percent_header=True)
+    votes = ('votes', 'election_day', 'absentee', 'provisional', 'military')
+    check_county('Washington', washington.WashingtonPDFPageParser, page, [
+        expected_row('Washington', 'U.S. House', 14, 'REP', 'Guy Reschenthaler',
+                     **dict(zip(votes, (500, 400, 90, 6, 4)))),
+        expected_row('Washington', 'U.S. House', 14, 'REP', 'Write-In', **dict(zip(votes, (1, 1, 0, 0, 0)))),
+    ])
+
+
+if __name__ == "__main__":
+    check_clinton()
+    check_adams()
+    check_beaver()
+    check_cambria()
+    check_centre()
+    check_chester()
+    check_clearfield()
+    check_lackawanna()
+    check_lebanon()
+    check_mifflin()
+    check_northampton()
+    check_washington()
@@ -1,13 +1,122 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import clarify
 import requests
 import zipfile
 import csv
+from lxml import etree
 
 try:
     from StringIO import StringIO
 except ImportError:
     from io import StringIO, BytesIO
 
+ClarityJurisdiction = namedtuple('ClarityJurisdiction', 'name total_voters ballots_cast')
+ClarityResult = namedtuple('ClarityResult', 'contest choice party vote_type precinct votes')
+
+COUNTY_DOWNLOAD_WORKERS = 8
+XML_FILENAME = 'detail.xml'
+JURISDICTION_TAGS = ('Precinct', 'County')
+TURNOUT_TAGS = ('VoterTurnout', 'ElectionVoterTurnout')
+
+
+class ClarityDetailReader:
+    # streams a Clarity detail.xml with iterparse instead of building the whole
+    # clarify.Parser object graph; iterating yields a ClarityJurisdiction for
+    # each turnout precinct, then, in document order, a ClarityResult for each
+    # of the results clarify.Parser lists (`precinct` is None
+    # for contest-wide totals and `choice` is None for over and under votes).
+    # Elements are cleared as soon as they are read, so memory stays flat
+    # however many precincts the report has
+    def __init__(self, f):
+        self._f = f
+        self.region = None
+
+    def __iter__(self):
+        jurisdiction_names = set()
+        turnout_tag = None
+        contest = choice = party = vote_type = None
+        for event, el in etree.iterparse(self._f, events=('start', 'end')):
+            if event == 'start':
+                if el.tag in TURNOUT_TAGS:
+                    turnout_tag = el.tag
+                elif el.tag == 'Contest':
+                    contest = el.get('text')
+                elif el.tag == 'Choice':
+                    choice, party = el.get('text'), el.get('party')
+                elif el.tag == 'VoteType':
+                    vote_type = el.get('name')
+                    yield ClarityResult(contest, choice, party, vote_type, None, self._parse_votes(el, choice))
+                continue
+            if el.tag in JURISDICTION_TAGS:
+                name = el.get('name')
+                if vote_type is not None:
+                    if name not in jurisdiction_names:
+                        # like clarify, results may name precincts missing from the turnout
+                        jurisdiction_names.add(name)
+                        yield ClarityJurisdiction(name, None, None)
+                    yield ClarityResult(contest, choice, party, vote_type, name, self._parse_votes(el, choice))
+                elif (turnout_tag, el.tag) in (('VoterTurnout', 'Precinct'), ('ElectionVoterTurnout', 'County')):
+                    jurisdiction_names.add(name)
+                    yield ClarityJurisdiction(name, self._parse_count(el, 'totalVoters'),
+                                              self._parse_count(el, 'ballotsCast'))
+            elif el.tag in TURNOUT_TAGS:
+                turnout_tag = None
+            elif el.tag == 'Region':
+                self.region = el.text
+            elif el.tag == 'VoteType':
+                vote_type = None
+            elif el.tag == 'Choice':
+                choice = party = None
+            self._release_element(el)
+
+    @staticmethod
+    def _parse_votes(el, choice):
+        # clarify keeps unparseable choice votes as strings
+        try:
+            return int(el.get('votes'))
+        except (TypeError, ValueError):
+            if choice is None:
+                raise
+            return el.get('votes')
+
+    @staticmethod
+    def _parse_count(el, attribute):
+        value = el.get(attribute)
+        return None if value is None else int(value)
+
+    @staticmethod
+    def _release_element(el):
+        el.clear()
+        parent = el.getparent()
+        if parent is not None:
+            while el.getprevious() is not None:
+                del parent[0]
+
+
+class ResultAccumulator:
+    # merges each result into the row with the same `key_fields` values,
+    # setting its vote type column in place; a dict index replaces scanning
+    # every row per result, and rows iterate in the order first seen
+    def __init__(self, key_fields):
+        self._key_fields = key_fields
+        self._rows = {}
+
+    def __iter__(self):
+        return iter(self._rows.values())
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, row, vote_type, votes):
+        key = tuple(row[field] for field in self._key_fields)
+        if key in self._rows:
+            self._rows[key][vote_type] = votes
+        else:
+            row[vote_type] = votes
+            self._rows[key] = row
+
+
 def statewide_results(url):
     j = clarify.Jurisdiction(url=url, level="state")
     r = requests.get("http://results.enr.clarityelections.com/WV/74487/207685/reports/detailxml.zip", stream=True)
@@ -15,7 +124,7 @@ def statewide_results(url):
     z.extractall()
     p = clarify.Parser()
     p.parse("detail.xml")
-    results = []
+    results = ResultAccumulator(('county', 'office', 'district', 'party', 'candidate'))
     for result in p.results:
         candidate = result.choice.text
         office, district = parse_office(result.contest.text)
@@ -37,11 +146,7 @@ def statewide_results(url):
             county = result.jurisdiction.name
         else:
             county = None
-        r = [x for x in results if x['county'] == county and x['office'] == office and x['district'] == district and x['party'] == party and x['candidate'] == candidate]
-        if r:
-             r[0][result.vote_type] = result.votes
-        else:
-            results.append({ 'county': county, 'office': office, 'district': district, 'party': party, 'candidate': candidate, result.vote_type: result.votes})
+        results.add({ 'county': county, 'office': office, 'district': district, 'party': party, 'candidate': candidate}, result.vote_type, result.votes)
 
     with open("20180508__wv__general.csv", "wt") as csvfile:
         w = csv.writer(csvfile)
@@ -50,34 +155,43 @@ def statewide_results(url):
             total_votes = row['Election Day']# + row['Absentee by Mail'] + row['Advance in Person'] + row['Provisional']
             w.writerow([row['county'], row['office'], row['district'], row['party'], row['candidate'], total_votes])
 
-def download_county_files(url, filename):
+def download_county_file(session, sub, filename):
+    # parses the county's detail.xml straight out of the downloaded zip
+    r = session.get(sub.report_url('xml'))
+    r.raise_for_status()
+    z = zipfile.ZipFile(BytesIO(r.content))
+    with z.open(XML_FILENAME) as detail_xml:
+        precinct_results(sub.name.replace(' ','_').lower(), filename, detail_xml)
+
+def download_county_files(url, filename, workers=COUNTY_DOWNLOAD_WORKERS):
     no_xml = []
     j = clarify.Jurisdiction(url=url, level="state")
     subs = j.get_subjurisdictions()
-    for sub in subs:
-        try:
-            r = requests.get(sub.report_url('xml'), stream=True)
-            z = zipfile.ZipFile(BytesIO(r.content))
-            z.extractall()
-            precinct_results(sub.name.replace(' ','_').lower(),filename)
-        except:
-            no_xml.append(sub.name)
+    with requests.Session() as session, ThreadPoolExecutor(workers) as executor:
+        downloads = [(sub, executor.submit(download_county_file, session, sub, filename)) for sub in subs]
+        for sub, download in downloads:
+            try:
+                download.result()
+            except Exception as e:
+                print(f'{sub.name} failed: {e!r}')
+                no_xml.append(sub.name)
 
     print(no_xml)
 
-def precinct_results(county_name, filename):
+def precinct_results(county_name, filename, detail_xml=XML_FILENAME):
     f = filename + '__' + county_name + '__precinct.csv'
-    p = clarify.Parser()
-    p.parse("detail.xml")
-    results = []
+    p = ClarityDetailReader(detail_xml)
+    results = ResultAccumulator(('county', 'precinct', 'office', 'district', 'party', 'candidate'))
     vote_types = []
-    for result in [x for x in p.results if not 'Number of Precincts' in x.vote_type]:
+    for result in p:
+        if isinstance(result, ClarityJurisdiction) or 'Number of Precincts' in result.vote_type:
+            continue
         vote_types.append(result.vote_type)
         if result.choice is None:
             continue
-        candidate = result.choice.text
-        office, district = parse_office(result.contest.text)
-        party = result.choice.party
+        candidate = result.choice
+        office, district = parse_office(result.contest)
+        party = result.party
         if '(' in candidate and party is None:
             if '(I)' in candidate:
                 if '(I)(I)' in candidate:
@@ -90,17 +204,10 @@ def precinct_results(county_name, filename):
                 candidate = candidate.strip()
             party = party.replace(')','').strip()
         county = p.region
-        if result.jurisdiction:
-            precinct = result.jurisdiction.name
-        else:
-            precinct = None
+        precinct = result.precinct
         if precinct == None:
             continue
-        r = [x for x in results if x['county'] == county and x['precinct'] == precinct and x['office'] == office and x['district'] == district and x['party'] == party and x['candidate'] == candidate]
-        if r:
-             r[0][result.vote_type] = result.votes
-        else:
-            results.append({ 'county': county, 'precinct': precinct, 'office': office, 'district': district, 'party': party, 'candidate': candidate, result.vote_type: result.votes})
+        results.add({ 'county': county, 'precinct': precinct, 'office': office, 'district': district, 'party': party, 'candidate': candidate}, result.vote_type, result.votes)
 
     vote_types = list(set(vote_types))
     vote_types.remove('overVotes')
@@ -0,0 +1,81 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from time import sleep
+import requests
+
+
+CLARITY_VERSION_FILENAME = 'current_ver.txt'
+POLLING_INTERVAL_IN_SECONDS = 60
+
+
+def get_current_version(election_url, session=requests):
+    # Clarity publishes each results update under a new version directory of
+    # the election; this tiny file names the latest one
+    response = session.get(f'{election_url}/{CLARITY_VERSION_FILENAME}')
+    response.raise_for_status()
+    return response.text.strip()
+
+
+def hash_vote_data(vote_data):
+    return hashlib.sha256(json.dumps(vote_data, separators=(',', ':')).encode()).hexdigest()
+
+
+class ContestDeltaTracker:
+    # remembers a digest of each contest's vote data from the previous version
+    # and appends one json line per version to `delta_log_filename`, naming
+    # the contests that were added, changed or removed
+    def __init__(self, delta_log_filename):
+        self._delta_log_filename = delta_log_filename
+        self._version = None
+        self._contest_to_digest = {}
+        self._contest_to_name = {}
+
+    def get_changed_contests(self, contest_to_digest):
+        # in the order of `contest_to_digest`
+        return [contest for contest, digest in contest_to_digest.items()
+                if self._contest_to_digest.get(contest) != digest]
+
+    def record(self, version, contest_to_digest, contest_to_name=None):
+        # called once the version has been written, so a failed refresh is
+        # retried in full; `contest_to_name` labels contests that are keyed by
+        # an id in the log
+        contest_to_name = contest_to_name or {}
+        changed_contests = self.get_changed_contests(contest_to_digest)
+        removed_contests = [contest for contest in self._contest_to_digest if contest not in contest_to_digest]
+        delta = {'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                 'from_version': self._version,
+                 'to_version': version,
+                 'changed_contests': changed_contests,
+                 'removed_contests': removed_contests}
+        if contest_to_name or self._contest_to_name:
+            delta['contest_names'] = {contest: contest_to_name.get(contest, self._contest_to_name.get(contest))
+                                      for contest in changed_contests + removed_contests}
+        with open(self._delta_log_filename, 'a') as f:
+            f.write(json.dumps(delta) + '\n')
+        print(f'version {version}: {len(changed_contests)} contests changed, {len(removed_contests)} removed')
+        self._version = version
+        self._contest_to_digest = dict(contest_to_digest)
+        self._contest_to_name = dict(contest_to_name)
+
+
+def poll_clarity(election_url, refresh, interval_in_seconds=POLLING_INTERVAL_IN_SECONDS, max_polls=None):
+    # checks the election's current version every `interval_in_seconds` and
+    # calls `refresh(version)` only when it changes; a failed check or refresh,
+    # whatever the error, is reported and retried at the next poll, so one bad
+    # version never ends an election night run
+    last_version = None
+    poll_count = 0
+    with requests.Session() as session:
+        while True:
+            try:
+                version = get_current_version(election_url, session)
+                if version != last_version:
+                    refresh(version)
+                    last_version = version
+            except Exception as e:
+                print(f'poll failed: {e!r}')
+            poll_count += 1
+            if max_polls is not None and poll_count >= max_polls:
+                return
+            sleep(interval_in_seconds)
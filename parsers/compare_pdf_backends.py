@@ -0,0 +1,68 @@
+import argparse
+from time import perf_counter
+from pdfreader import PageDoesNotExist
+from parsers.pdf_backends import AVAILABLE_PDF_BACKENDS, DEFAULT_PDF_BACKEND, PDF_BACKENDS, open_pdf_backend
+
+
+def render_pages(filename, backend, last_page_number):
+    with open(filename, 'rb') as f:
+        pdf_backend = open_pdf_backend(f, backend)
+        page_number = 1
+        while last_page_number is None or page_number <= last_page_number:
+            # navigating is timed too, since some backends do their work there
+            start_time = perf_counter()
+            try:
+                if page_number != 1:
+                    pdf_backend.next()
+                strings = pdf_backend.render()
+            except PageDoesNotExist:
+                return
+            yield page_number, list(strings), perf_counter() - start_time
+            page_number += 1
+
+
+def first_difference(reference_strings, strings):
+    for offset, (reference_string, string) in enumerate(zip(reference_strings, strings)):
+        if reference_string != string:
+            return offset, reference_string, string
+    offset = min(len(reference_strings), len(strings))
+    return offset, reference_strings[offset:offset + 1], strings[offset:offset + 1]
+
+
+def compare_backends(filename, backends, last_page_number=None):
+    reference_pages = {page_number: strings for page_number, strings, _
+                       in render_pages(filename, DEFAULT_PDF_BACKEND, last_page_number)}
+    for backend in backends:
+        page_count = 0
+        mismatched_pages = 0
+        total_seconds = 0
+        for page_number, strings, seconds in render_pages(filename, backend, last_page_number):
+            page_count += 1
+            total_seconds += seconds
+            reference_strings = reference_pages.get(page_number)
+            if strings != reference_strings:
+                mismatched_pages += 1
+                if reference_strings is None:
+                    print(f'{backend}: page {page_number} does not exist in {DEFAULT_PDF_BACKEND}')
+                else:
+                    offset, expected, actual = first_difference(reference_strings, strings)
+                    print(f'{backend}: page {page_number} differs at string {offset}: '
+                          f'expected {expected!r}, got {actual!r}')
+        if page_count != len(reference_pages):
+            print(f'{backend}: rendered {page_count} pages, {DEFAULT_PDF_BACKEND} rendered {len(reference_pages)}')
+        pages_per_second = page_count / total_seconds if total_seconds else float('inf')
+        print(f'{backend}: {page_count} pages in {total_seconds:.2f}s ({pages_per_second:.1f} pages/s), '
+              f'{mismatched_pages} pages differ from {DEFAULT_PDF_BACKEND}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the string streams of each pdf text backend')
+    parser.add_argument('pdf')
+    parser.add_argument('--backends', nargs='+', choices=sorted(PDF_BACKENDS), default=AVAILABLE_PDF_BACKENDS)
+    parser.add_argument('--last-page', type=int, default=None)
+    args = parser.parse_args()
+    compare_backends(args.pdf, args.backends, args.last_page)
+
+
+if __name__ == "__main__":
+    main()
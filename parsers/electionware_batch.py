@@ -0,0 +1,118 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+import csv
+import glob
+import importlib
+import os
+import sys
+from time import perf_counter
+from parsers.electionware_parser import ElectionwarePDFPageParser
+from parsers.output_sinks import count_output_rows, get_output_filename, get_output_format
+
+
+BATCH_WORKERS = os.cpu_count() or 1
+COUNTY_MODULE_PATTERN = 'pa_*.py'
+# county parsers read local pdfs; scrapers download theirs and are not batched
+PDF_PARSER_MODULE_PATTERN = 'pa_*_parser.py'
+SUMMARY_FIELDS = ['county', 'module', 'status', 'rows', 'seconds', 'error']
+
+
+def discover_electionware_modules(module_pattern=PDF_PARSER_MODULE_PATTERN):
+    # county modules that subclass the shared Electionware page parser;
+    # counties whose own dependencies are not installed are skipped
+    parsers_dir = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(parsers_dir, module_pattern))):
+        module_name = 'parsers.' + os.path.splitext(os.path.basename(path))[0]
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            print(f'skipping {module_name}: {e}')
+            continue
+        if get_page_parser_clazz(module):
+            yield module_name, module.COUNTY
+
+
+def get_page_parser_clazz(module):
+    for value in vars(module).values():
+        if isinstance(value, type) and issubclass(value, ElectionwarePDFPageParser) \
+                and value.__module__ == module.__name__:
+            return value
+    return None
+
+
+def run_county(module_name, county, county_args, verbose=False):
+    # calls the county's `convert()` in this worker, which already has the
+    # shared parser modules imported; the county reads its flags from sys.argv
+    module = importlib.import_module(module_name)
+    output_format = get_output_format(county_args)
+    output_filename = get_output_filename(module.OUTPUT_FILE, output_format)
+    sys.argv = [module.__file__] + county_args
+    summary = {'county': county, 'module': module_name, 'status': 'ok', 'rows': '', 'error': ''}
+    start_time = perf_counter()
+    try:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(sys.stdout if verbose else devnull):
+            module.convert()
+        summary['rows'] = count_output_rows(output_filename, output_format)
+    except (Exception, SystemExit) as e:
+        # a county calling sys.exit() fails on its own instead of taking the worker down
+        summary['status'] = 'failed'
+        summary['error'] = f'{type(e).__name__}: {e}'
+    summary['seconds'] = round(perf_counter() - start_time, 3)
+    return summary
+
+
+def run_batch(modules, county_args, workers=BATCH_WORKERS, verbose=False):
+    summaries = []
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(run_county, module_name, county, county_args, verbose)
+                   for module_name, county in modules]
+        for future in as_completed(futures):
+            summary = future.result()
+            print(f'{summary["county"]}: {summary["status"]}, {summary["rows"] or 0} rows '
+                  f'in {summary["seconds"]:.2f}s {summary["error"]}'.rstrip())
+            summaries.append(summary)
+    return sorted(summaries, key=lambda x: x['county'])
+
+
+def print_summary(summaries, wall_seconds):
+    total_rows = sum(summary['rows'] or 0 for summary in summaries)
+    total_seconds = sum(summary['seconds'] for summary in summaries)
+    failed_counties = [summary['county'] for summary in summaries if summary['status'] != 'ok']
+    print(f'{len(summaries)} counties, {total_rows} rows, {total_seconds:.2f}s of county time '
+          f'in {wall_seconds:.2f}s wall time')
+    if failed_counties:
+        print(f'failed: {", ".join(failed_counties)}')
+
+
+def write_summary(summaries, summary_filename):
+    with open(summary_filename, 'w', newline='') as f:
+        csv_writer = csv.DictWriter(f, SUMMARY_FIELDS)
+        csv_writer.writeheader()
+        csv_writer.writerows(summaries)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run every Electionware county parser in a process pool; '
+                    'unrecognized arguments (e.g. --resume, --output-format) are passed to each county')
+    parser.add_argument('--counties', nargs='+', help='only run these counties')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS)
+    parser.add_argument('--summary', help='also write the summary to this csv file')
+    parser.add_argument('--verbose', action='store_true', help="show each county's page progress")
+    args, county_args = parser.parse_known_args()
+    modules = list(discover_electionware_modules())
+    if args.counties:
+        counties = {county.lower() for county in args.counties}
+        modules = [(module_name, county) for module_name, county in modules if county.lower() in counties]
+    start_time = perf_counter()
+    summaries = run_batch(modules, county_args, args.workers, args.verbose)
+    print_summary(summaries, perf_counter() - start_time)
+    if args.summary:
+        write_summary(summaries, args.summary)
+    if any(summary['status'] != 'ok' for summary in summaries):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,22 @@
-from parsers.pa_pdf_parser import PDFStringIterator
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import os
+from tempfile import TemporaryDirectory
+from parsers.output_sinks import CSVSink
+from parsers.pa_pdf_parser import PDFPageIterator, PDFStringIterator, ResultRow, get_pdf_cache_key, \
+    parse_pdf_pages_to_csv
+from parsers.pdf_backends import DEFAULT_PDF_BACKEND
+from parsers.pdf_string_cache import PDF_STRING_CACHE
 
 
 INSTRUCTION_ROW_PREFIX = 'Vote For'
+SHARD_WORKERS = os.cpu_count() or 1
+PAGES_PER_SHARD = 16
+SHARD_SUFFIX = '.shard.csv'
+VOTE_PERCENT_HEADER = 'VOTE %'
+OPTIONAL_VOTE_PERCENT = 'optional'
+REQUIRED_VOTE_PERCENT = 'required'
 BALLOTS_CAST_PREFIX = 'Ballots Cast'
 
 PARTIES = {
@@ -45,17 +60,36 @@ class ElectionwarePDFTableParser:
     _expected_table_headers = None
     _openelections_mapped_header = None
     _raw_office_to_office_and_district = None
+    # filters on the cleaned office and party of each row; they are also
+    # checked when a table's office is parsed, so excluded tables are skipped
+    # without building any rows
+    _skipped_offices = ('Voter Turnout',)
+    _skipped_office_prefixes = ()
+    _skipped_office_substrings = ('Delegate',)
+    _skipped_parties = ('Blank',)
+    _skipped_candidates = ('Total Votes Cast', 'Contest Totals', 'Not Assigned')
+    _skipped_candidate_prefixes = ()
 
     def __init__(self, precinct, string_iterator):
         self._string_iterator = string_iterator
         self._precinct = precinct
         self._skip_instruction_row()
         self._parse_header()
-        self._verify_table_header()
+        self._is_skipped = self._table_is_skipped()
+        if self._is_skipped:
+            self._skip_table()
+        else:
+            self._verify_table_header()
 
     def __iter__(self):
+        if self._is_skipped:
+            return
         while True:
-            row = self._parse_row()
+            try:
+                row = self._parse_row()
+            except StopIteration:
+                # a StopIteration escaping a generator is a RuntimeError since PEP 479
+                return
             if self._should_be_recorded(row):
                 yield row
 
@@ -68,6 +102,23 @@ class ElectionwarePDFTableParser:
                 self._party = self._party.upper()
                 break
 
+    def _table_is_skipped(self):
+        if self._office == 'STATISTICS':
+            # the office and party of statistics rows come from each row's candidate
+            return False
+        row = ResultRow(county=self._county,
+                        precinct=self._precinct,
+                        office=self._office,
+                        party=self._party,
+                        district='',
+                        candidate='')
+        self._clean_row(row)
+        return self._office_is_skipped(row['office'], row['party'])
+
+    def _skip_table(self):
+        while not (self._string_iterator.page_is_done() or self._string_iterator.table_is_done()):
+            next(self._string_iterator)
+
     def _verify_table_header(self):
         actual_header = ''
         while len(actual_header) < len(self._expected_table_headers[0]):
@@ -79,12 +130,12 @@ class ElectionwarePDFTableParser:
             raise StopIteration
         self._string_iterator.swap_any_bad_ballots_cast_fields()
         candidate = next(self._string_iterator)
-        row = {'county': self._county,
-               'precinct': self._precinct,
-               'office': self._office,
-               'party': self._party,
-               'district': '',
-               'candidate': candidate.strip()}
+        row = ResultRow(county=self._county,
+                        precinct=self._precinct,
+                        office=self._office,
+                        party=self._party,
+                        district='',
+                        candidate=candidate.strip())
         self._clean_row(row)
         self._populate_votes(row)
         return row
@@ -115,15 +166,17 @@ class ElectionwarePDFTableParser:
 
     @classmethod
     def _should_be_recorded(cls, row):
-        if row['candidate'] in ('Total Votes Cast', 'Contest Totals', 'Not Assigned'):
-            return False
-        if 'Delegate' in row['office']:
-            return False
-        if row['office'] == 'Voter Turnout':
+        if row['candidate'] in cls._skipped_candidates or row['candidate'].startswith(cls._skipped_candidate_prefixes):
             return False
-        if row['party'] == 'Blank':
-            return False
-        return True
+        return not cls._office_is_skipped(row['office'], row['party'])
+
+    @classmethod
+    def _office_is_skipped(cls, office, party):
+        if office in cls._skipped_offices or party in cls._skipped_parties:
+            return True
+        if office.startswith(cls._skipped_office_prefixes):
+            return True
+        return any(substring in office for substring in cls._skipped_office_substrings)
 
 
 class ElectionwarePDFPageParser:
@@ -149,10 +202,205 @@ class ElectionwarePDFPageParser:
         self._precinct = next(self._string_iterator)
 
 
-def pdf_to_csv(pdf, csv_writer, pdf_page_parser_clazz):
+class ElectionwareCountyProfile:
+    # everything that distinguishes one county's Electionware report from
+    # another; `trailing_vote_percent` is None, OPTIONAL_VOTE_PERCENT or
+    # REQUIRED_VOTE_PERCENT for the vote % string after each row's votes
+    def __init__(self, county, header, footer_substrings, expected_table_headers, openelections_mapped_header,
+                 raw_office_to_office_and_district, title_case_offices=False, title_case_candidates=False,
+                 has_vote_percent_header=False, trailing_vote_percent=None, candidates_without_vote_percent=(),
+                 skipped_offices=ElectionwarePDFTableParser._skipped_offices,
+                 skipped_office_prefixes=ElectionwarePDFTableParser._skipped_office_prefixes,
+                 skipped_office_substrings=ElectionwarePDFTableParser._skipped_office_substrings,
+                 skipped_candidates=ElectionwarePDFTableParser._skipped_candidates,
+                 skipped_candidate_prefixes=ElectionwarePDFTableParser._skipped_candidate_prefixes):
+        self.county = county
+        self.header = header
+        self.footer_substrings = tuple(footer_substrings)
+        self.expected_table_headers = expected_table_headers
+        self.openelections_mapped_header = openelections_mapped_header
+        self.raw_office_to_office_and_district = raw_office_to_office_and_district
+        self.title_case_offices = title_case_offices
+        self.title_case_candidates = title_case_candidates
+        self.has_vote_percent_header = has_vote_percent_header
+        self.trailing_vote_percent = trailing_vote_percent
+        self.candidates_without_vote_percent = candidates_without_vote_percent
+        self.skipped_offices = skipped_offices
+        self.skipped_office_prefixes = tuple(skipped_office_prefixes)
+        self.skipped_office_substrings = skipped_office_substrings
+        self.skipped_candidates = skipped_candidates
+        self.skipped_candidate_prefixes = tuple(skipped_candidate_prefixes)
+
+
+class CompiledElectionwarePDFStringIterator(ElectionwarePDFStringIterator):
+    _footer_prefixes = None
+
+    def page_is_done(self):
+        return self._strings[self._strings_offset].startswith(self._footer_prefixes)
+
+    def table_is_done(self):
+        return self._strings[self._strings_offset].startswith(INSTRUCTION_ROW_PREFIX)
+
+
+class CompiledElectionwarePDFTableParser(ElectionwarePDFTableParser):
+    # offices and candidates are cleaned once per distinct raw string, and the
+    # vote % handling is picked when the profile is compiled
+    _has_vote_percent_header = False
+    _candidates_without_vote_percent = ()
+    _title_case_offices = False
+    _title_case_candidates = False
+    _cleaned_offices = None
+    _cleaned_candidates = None
+
+    def _verify_table_header(self):
+        if self._has_vote_percent_header and self._office != 'STATISTICS':
+            vote_percent_header = next(self._string_iterator)
+            assert vote_percent_header == VOTE_PERCENT_HEADER
+        super()._verify_table_header()
+
+    def _populate_votes_and_optional_vote_percent(self, row):
+        ElectionwarePDFTableParser._populate_votes(self, row)
+        if '%' in self._string_iterator.peek():
+            next(self._string_iterator)  # vote % string, not always supplied
+
+    def _populate_votes_and_required_vote_percent(self, row):
+        ElectionwarePDFTableParser._populate_votes(self, row)
+        if self._office != 'STATISTICS' and row['candidate'] not in self._candidates_without_vote_percent:
+            vote_percent_string = next(self._string_iterator)
+            assert '%' in vote_percent_string
+
+    @classmethod
+    def _clean_row(cls, row):
+        if row['office'] == 'STATISTICS':
+            row['office'], party = row['candidate'].split(' - ', 1)
+            row['party'] = PARTY_ABBREVIATIONS[party]
+            row['candidate'] = ''
+        office_and_district = cls._cleaned_offices.get(row['office'])
+        if office_and_district is None:
+            office_and_district = cls._cleaned_offices[row['office']] = cls._clean_office(row['office'])
+        row['office'], row['district'] = office_and_district
+        candidate = cls._cleaned_candidates.get(row['candidate'])
+        if candidate is None:
+            candidate = cls._cleaned_candidates[row['candidate']] = cls._clean_candidate(row['candidate'])
+        row['candidate'] = candidate
+
+    @classmethod
+    def _clean_office(cls, raw_office):
+        office, district = cls._raw_office_to_office_and_district.get(raw_office, (raw_office, ''))
+        return office.title() if cls._title_case_offices else office, district
+
+    @classmethod
+    def _clean_candidate(cls, raw_candidate):
+        candidate = 'Write-in' if raw_candidate == 'Write-In Totals' else raw_candidate
+        return candidate.title() if cls._title_case_candidates else candidate
+
+
+VOTE_POPULATORS = {
+    None: ElectionwarePDFTableParser._populate_votes,
+    OPTIONAL_VOTE_PERCENT: CompiledElectionwarePDFTableParser._populate_votes_and_optional_vote_percent,
+    REQUIRED_VOTE_PERCENT: CompiledElectionwarePDFTableParser._populate_votes_and_required_vote_percent,
+}
+
+
+def compile_county_profile(profile, module_name):
+    # builds the county's string iterator, table parser and page parser
+    # classes; the page parser must be bound to `<county>PDFPageParser` in
+    # `module_name` so it can be pickled into worker processes
+    def build_clazz(suffix, base_clazz, attributes):
+        return type(f'{profile.county}{suffix}', (base_clazz,), dict(attributes, __module__=module_name))
+
+    string_iterator_clazz = build_clazz('PDFStringIterator', CompiledElectionwarePDFStringIterator, {
+        '_first_footer_substring': profile.footer_substrings[0],
+        '_second_footer_substring': profile.footer_substrings[-1],
+        '_footer_prefixes': profile.footer_substrings,
+    })
+    table_parser_clazz = build_clazz('PDFTableParser', CompiledElectionwarePDFTableParser, {
+        '_county': profile.county,
+        '_expected_table_headers': profile.expected_table_headers,
+        '_openelections_mapped_header': profile.openelections_mapped_header,
+        '_raw_office_to_office_and_district': profile.raw_office_to_office_and_district,
+        '_skipped_offices': profile.skipped_offices,
+        '_skipped_office_prefixes': profile.skipped_office_prefixes,
+        '_skipped_office_substrings': profile.skipped_office_substrings,
+        '_skipped_candidates': profile.skipped_candidates,
+        '_skipped_candidate_prefixes': profile.skipped_candidate_prefixes,
+        '_has_vote_percent_header': profile.has_vote_percent_header,
+        '_candidates_without_vote_percent': profile.candidates_without_vote_percent,
+        '_title_case_offices': profile.title_case_offices,
+        '_title_case_candidates': profile.title_case_candidates,
+        '_populate_votes': VOTE_POPULATORS[profile.trailing_vote_percent],
+        '_cleaned_offices': {},
+        '_cleaned_candidates': {},
+    })
+    return build_clazz('PDFPageParser', ElectionwarePDFPageParser, {
+        '_pdf_string_iterator_clazz': string_iterator_clazz,
+        '_pdf_table_parser_clazz': table_parser_clazz,
+        '_header': profile.header,
+    })
+
+
+def pdf_to_csv(pdf, csv_writer, pdf_page_parser_clazz, pipelined=False, checkpoint=None, metrics=None):
+    def parse_page(page, continuation_state):
+        yield from pdf_page_parser_clazz(page)
+        return ()  # pages are parsed independently, so there is no continuation state
+
+    parse_pdf_pages_to_csv(pdf, csv_writer, parse_page, (), pipelined, checkpoint, metrics)
+
+
+def get_shard_filename(prefix, first_page_number, last_page_number):
+    # zero padded, so sorting shard filenames puts them in page order
+    return f'{prefix}.{first_page_number:05d}-{last_page_number:05d}{SHARD_SUFFIX}'
+
+
+def pdf_shard_to_csv(filename, pdf_page_parser_factory, first_page_number, last_page_number, fieldnames,
+                     shard_filename, pdf_hash=None):
+    # parses one page range into a headerless shard csv and returns the number
+    # of pages it contained; pages carry no state between them, so shards can
+    # be parsed in any order, by any process or machine. the factory is called
+    # with each page and must be picklable, e.g. a page parser class or a
+    # `functools.partial` binding a county parser's extra arguments
+    page_count = 0
+    with CSVSink(shard_filename, fieldnames) as csv_writer:
+        with PDFPageIterator(filename, first_page_number=first_page_number, last_page_number=last_page_number,
+                             pdf_hash=pdf_hash) as pdf:
+            for page in pdf:
+                print(f'processing page {page.get_page_number()}')
+                csv_writer.writerows(pdf_page_parser_factory(page))
+                page_count += 1
+    return page_count
+
+
+def merge_pdf_shards(shard_filenames, csv_writer):
+    # `shard_filenames` must be in page order
     csv_writer.writeheader()
-    for page in pdf:
-        print(f'processing page {page.get_page_number()}')
-        pdf_page_parser = pdf_page_parser_clazz(page)
-        for row in pdf_page_parser:
-            csv_writer.writerow(row)
+    for shard_filename in shard_filenames:
+        with open(shard_filename, newline='') as f:
+            csv_writer.writerows(csv.DictReader(f, csv_writer.fieldnames))
+
+
+def sharded_pdf_to_csv(filename, csv_writer, pdf_page_parser_factory, workers=SHARD_WORKERS,
+                       pages_per_shard=PAGES_PER_SHARD):
+    # the page count is not known up front, so shards are handed out until one
+    # comes back short; the pdf is hashed for the string cache once, here
+    pdf_hash = get_pdf_cache_key(filename, DEFAULT_PDF_BACKEND) if PDF_STRING_CACHE else None
+    with TemporaryDirectory() as shard_dir:
+        shard_filenames = []
+        with ProcessPoolExecutor(workers) as executor:
+            pending_shards = deque()
+            next_page_number = 1
+            while True:
+                while len(pending_shards) < 2 * workers:
+                    last_page_number = next_page_number + pages_per_shard - 1
+                    shard_filename = get_shard_filename(os.path.join(shard_dir, 'pages'), next_page_number,
+                                                        last_page_number)
+                    future = executor.submit(pdf_shard_to_csv, filename, pdf_page_parser_factory, next_page_number,
+                                             last_page_number, csv_writer.fieldnames, shard_filename, pdf_hash)
+                    pending_shards.append((shard_filename, future))
+                    next_page_number = last_page_number + 1
+                shard_filename, future = pending_shards.popleft()
+                shard_filenames.append(shard_filename)
+                if future.result() < pages_per_shard:
+                    for _, future in pending_shards:
+                        future.cancel()
+                    break
+        merge_pdf_shards(shard_filenames, csv_writer)
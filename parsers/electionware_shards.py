@@ -0,0 +1,152 @@
+import argparse
+from functools import partial
+import glob
+import importlib
+import inspect
+import os
+from parsers.electionware_batch import COUNTY_MODULE_PATTERN, discover_electionware_modules, get_page_parser_clazz
+from parsers.electionware_parser import PAGES_PER_SHARD, SHARD_SUFFIX, SHARD_WORKERS, get_shard_filename, \
+    merge_pdf_shards, pdf_shard_to_csv, sharded_pdf_to_csv
+from parsers.output_sinks import open_output_sink
+
+
+PDF_SUFFIX = '.pdf'
+# page parser arguments besides the page, and the flags that set them for one
+# of a county's pdfs, e.g. the party of a Cumberland pdf or the precinct of a
+# downloaded Franklin pdf
+PAGE_PARSER_ARGUMENT_FLAGS = {
+    'party': '--party',
+    'precinct_id_string': '--precinct',
+}
+
+
+def load_county_module(county):
+    # scrapers' downloaded pdfs can be sharded too, e.g. Franklin's
+    for module_name, module_county in discover_electionware_modules(COUNTY_MODULE_PATTERN):
+        if county.lower() in (module_county.lower(), module_name):
+            return importlib.import_module(module_name)
+    raise ValueError(f'no Electionware parser for {county}')
+
+
+def get_sharded_page_parser(module):
+    # a county can shard with a row filtering function instead of its page
+    # parser class, e.g. Cumberland
+    return getattr(module, 'SHARDED_PAGE_PARSER', None) or get_page_parser_clazz(module)
+
+
+def get_page_parser_arguments(module, args):
+    _, *parameters = inspect.signature(get_sharded_page_parser(module)).parameters.values()
+    page_parser_arguments = {}
+    for parameter in parameters:
+        if parameter.default is not inspect.Parameter.empty:
+            continue
+        assert parameter.name in PAGE_PARSER_ARGUMENT_FLAGS, \
+            f'{module.COUNTY} cannot be sharded: its page parser needs {parameter.name} besides the page'
+        value = getattr(args, parameter.name)
+        assert value, f'{module.COUNTY} needs {PAGE_PARSER_ARGUMENT_FLAGS[parameter.name]} for each pdf'
+        page_parser_arguments[parameter.name] = value
+    return page_parser_arguments
+
+
+def get_page_parser_factory(module, page_parser_arguments):
+    # shard workers build each page's parser from the page alone, so any other
+    # arguments are bound with a partial, which stays picklable
+    page_parser = get_sharded_page_parser(module)
+    return partial(page_parser, **page_parser_arguments) if page_parser_arguments else page_parser
+
+
+def get_shard_prefix(module, page_parser_arguments):
+    # each of a county's pdfs shards under its own prefix, so page ranges of
+    # different pdfs never collide and `merge` still collects all of them
+    return '.'.join([module.OUTPUT_FILE, *page_parser_arguments.values()])
+
+
+def get_pdf_output_filename(module, page_parser_arguments):
+    # one output per pdf for counties that are parsed from several
+    root, extension = os.path.splitext(module.OUTPUT_FILE)
+    return '.'.join([root, *page_parser_arguments.values()]) + extension
+
+
+def get_pdf_filename(module):
+    # the county's single source pdf, e.g. `ADAMS_FILE`
+    pdf_filenames = [value for name, value in vars(module).items()
+                     if name.endswith('_FILE') and isinstance(value, str) and value.lower().endswith(PDF_SUFFIX)]
+    assert len(pdf_filenames) == 1, f'{module.COUNTY} has no single source pdf; pass one with --pdf'
+    return pdf_filenames[0]
+
+
+def parse_page_range(page_range):
+    first_page_number, last_page_number = page_range.split('-')
+    return int(first_page_number), int(last_page_number)
+
+
+def shard(args):
+    # parses one page range, e.g. on another machine
+    module = load_county_module(args.county)
+    page_parser_arguments = get_page_parser_arguments(module, args)
+    pdf_page_parser_factory = get_page_parser_factory(module, page_parser_arguments)
+    first_page_number, last_page_number = parse_page_range(args.pages)
+    shard_filename = get_shard_filename(args.prefix or get_shard_prefix(module, page_parser_arguments),
+                                        first_page_number, last_page_number)
+    page_count = pdf_shard_to_csv(args.pdf or get_pdf_filename(module), pdf_page_parser_factory,
+                                  first_page_number, last_page_number, module.OUTPUT_HEADER, shard_filename)
+    print(f'wrote {page_count} pages to {shard_filename}')
+
+
+def merge(args):
+    module = load_county_module(args.county)
+    prefix = args.prefix or module.OUTPUT_FILE
+    shard_filenames = sorted(args.shards or glob.glob(glob.escape(prefix) + '.*' + SHARD_SUFFIX))
+    assert shard_filenames, f'no shards found for {prefix}'
+    with open_output_sink(module.OUTPUT_FILE, module.OUTPUT_HEADER) as csv_writer:
+        merge_pdf_shards(shard_filenames, csv_writer)
+    print(f'merged {len(shard_filenames)} shards')
+
+
+def run(args):
+    # shards the pdf across a local process pool
+    module = load_county_module(args.county)
+    page_parser_arguments = get_page_parser_arguments(module, args)
+    pdf_page_parser_factory = get_page_parser_factory(module, page_parser_arguments)
+    pdf_filename = args.pdf or get_pdf_filename(module)
+    output_filename = get_pdf_output_filename(module, page_parser_arguments)
+    with open_output_sink(output_filename, module.OUTPUT_HEADER) as csv_writer:
+        sharded_pdf_to_csv(pdf_filename, csv_writer, pdf_page_parser_factory,
+                           args.workers, args.pages_per_shard)
+
+
+def add_page_parser_arguments(parser):
+    parser.add_argument('--party', help="party of the pdf, for counties with one pdf per party, e.g. Republican")
+    parser.add_argument('--precinct', dest='precinct_id_string',
+                        help='precinct of the pdf, for counties with one pdf per precinct, e.g. 05')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse an Electionware county report in page range shards')
+    subparsers = parser.add_subparsers(required=True)
+    shard_parser = subparsers.add_parser('shard', help='parse one page range into a shard csv')
+    shard_parser.add_argument('county')
+    shard_parser.add_argument('--pages', required=True, help='inclusive page range, e.g. 1-50')
+    shard_parser.add_argument('--pdf')
+    shard_parser.add_argument('--prefix', help="shard filename prefix; defaults to the county's output file")
+    add_page_parser_arguments(shard_parser)
+    shard_parser.set_defaults(func=shard)
+    merge_parser = subparsers.add_parser('merge', help="merge shard csvs into the county's output file")
+    merge_parser.add_argument('county')
+    merge_parser.add_argument('shards', nargs='*', help='defaults to every shard with the prefix')
+    merge_parser.add_argument('--prefix', help="shard filename prefix; defaults to the county's output file")
+    merge_parser.set_defaults(func=merge)
+    run_parser = subparsers.add_parser('run', help='shard and merge in a local process pool')
+    run_parser.add_argument('county')
+    run_parser.add_argument('--pdf')
+    run_parser.add_argument('--workers', type=int, default=SHARD_WORKERS)
+    run_parser.add_argument('--pages-per-shard', type=int, default=PAGES_PER_SHARD)
+    add_page_parser_arguments(run_parser)
+    run_parser.set_defaults(func=run)
+    # --output-format is read by open_output_sink
+    args, _ = parser.parse_known_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import csv
+import gzip
+import sys
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+OUTPUT_FORMAT_FLAG = '--output-format'
+CSV_OUTPUT_FORMAT = 'csv'
+GZIP_CSV_OUTPUT_FORMAT = 'csv.gz'
+PARQUET_OUTPUT_FORMAT = 'parquet'
+OUTPUT_FORMATS = (CSV_OUTPUT_FORMAT, GZIP_CSV_OUTPUT_FORMAT, PARQUET_OUTPUT_FORMAT)
+ROWS_PER_BATCH = 10000
+
+
+class OutputSink:
+    # drop-in replacement for csv.DictWriter that buffers rows column by column
+    # and writes them out in batches of `rows_per_batch`
+    supports_checkpoints = False
+
+    def __init__(self, filename, fieldnames, rows_per_batch=ROWS_PER_BATCH):
+        self.name = filename
+        self.fieldnames = fieldnames
+        self._rows_per_batch = rows_per_batch
+        self._columns = [[] for _ in fieldnames]
+        self._buffered_row_count = 0
+        self._unwritten_fields = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def writeheader(self):
+        raise NotImplementedError
+
+    def writerow(self, row):
+        # takes a dict, or a row object such as a namedtuple or ResultRow whose
+        # `_fields` are read as attributes
+        if isinstance(row, dict):
+            wrong_fields = row.keys() - self.fieldnames
+            if wrong_fields:
+                raise ValueError('dict contains fields not in fieldnames: ' + ', '.join(map(repr, wrong_fields)))
+            for column, field in zip(self._columns, self.fieldnames):
+                column.append(row.get(field, ''))
+        else:
+            wrong_fields = [field for field in self._get_unwritten_fields(type(row))
+                            if getattr(row, field) is not None]
+            if wrong_fields:
+                raise ValueError('row contains fields not in fieldnames: ' + ', '.join(map(repr, wrong_fields)))
+            for column, field in zip(self._columns, self.fieldnames):
+                column.append(getattr(row, field))
+        self._buffered_row_count += 1
+        if self._buffered_row_count >= self._rows_per_batch:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        if self._buffered_row_count:
+            self._write_batch(self._columns)
+            self._columns = [[] for _ in self.fieldnames]
+            self._buffered_row_count = 0
+
+    def close(self):
+        self.flush()
+
+    def _get_unwritten_fields(self, row_type):
+        if row_type not in self._unwritten_fields:
+            self._unwritten_fields[row_type] = [field for field in row_type._fields if field not in self.fieldnames]
+        return self._unwritten_fields[row_type]
+
+    def _write_batch(self, columns):
+        raise NotImplementedError
+
+
+class CSVSink(OutputSink):
+    supports_checkpoints = True
+
+    def __init__(self, filename, fieldnames, append=False, rows_per_batch=ROWS_PER_BATCH):
+        super().__init__(filename, fieldnames, rows_per_batch)
+        self._f = self._open(filename, append)
+        self._csv_writer = csv.writer(self._f)
+
+    def writeheader(self):
+        self.flush()
+        self._csv_writer.writerow(self.fieldnames)
+
+    def flush(self):
+        super().flush()
+        self._f.flush()
+
+    def fileno(self):
+        return self._f.fileno()
+
+    def truncate(self, size):
+        self.flush()
+        self._f.truncate(size)
+
+    def close(self):
+        super().close()
+        self._f.close()
+
+    def _write_batch(self, columns):
+        self._csv_writer.writerows(zip(*columns))
+
+    @staticmethod
+    def _open(filename, append):
+        return open(filename, 'a' if append else 'w', newline='')
+
+
+class GzipCSVSink(CSVSink):
+    supports_checkpoints = False
+
+    @staticmethod
+    def _open(filename, append):
+        assert not append, 'compressed csv output cannot be appended to'
+        return gzip.open(filename, 'wt', newline='')
+
+
+class ParquetSink(OutputSink):
+    # every column is stored as a string, exactly as it would appear in the csv
+    def __init__(self, filename, fieldnames, append=False, rows_per_batch=ROWS_PER_BATCH):
+        assert pyarrow, 'parquet output requires pyarrow'
+        assert not append, 'parquet output cannot be appended to'
+        super().__init__(filename, fieldnames, rows_per_batch)
+        self._schema = pyarrow.schema([(field, pyarrow.string()) for field in fieldnames])
+        self._parquet_writer = pyarrow.parquet.ParquetWriter(filename, self._schema)
+
+    def writeheader(self):
+        pass  # the column names are part of the parquet schema
+
+    def close(self):
+        super().close()
+        self._parquet_writer.close()
+
+    def _write_batch(self, columns):
+        arrays = [pyarrow.array(['' if value is None else str(value) for value in column], pyarrow.string())
+                  for column in columns]
+        self._parquet_writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self._schema))
+
+
+OUTPUT_SINKS = {
+    CSV_OUTPUT_FORMAT: CSVSink,
+    GZIP_CSV_OUTPUT_FORMAT: GzipCSVSink,
+    PARQUET_OUTPUT_FORMAT: ParquetSink,
+}
+
+
+def get_output_format(args=None):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(OUTPUT_FORMAT_FLAG, choices=OUTPUT_FORMATS, default=CSV_OUTPUT_FORMAT)
+    known_args, _ = parser.parse_known_args(sys.argv[1:] if args is None else args)
+    return known_args.output_format
+
+
+def get_output_filename(filename, output_format):
+    if output_format == CSV_OUTPUT_FORMAT:
+        return filename
+    if filename.endswith('.' + CSV_OUTPUT_FORMAT):
+        filename = filename[:-len(CSV_OUTPUT_FORMAT) - 1]
+    return f'{filename}.{output_format}'
+
+
+def open_output_sink(filename, fieldnames, output_format=None, append=False):
+    # the format defaults to the `--output-format` command line flag, so every
+    # county script can switch formats without its own argument parsing
+    output_format = output_format or get_output_format()
+    return OUTPUT_SINKS[output_format](get_output_filename(filename, output_format), fieldnames, append)
+
+
+def count_output_rows(filename, output_format):
+    if output_format == PARQUET_OUTPUT_FORMAT:
+        assert pyarrow, 'parquet output requires pyarrow'
+        return pyarrow.parquet.ParquetFile(filename).metadata.num_rows
+    open_output = gzip.open if output_format == GZIP_CSV_OUTPUT_FORMAT else open
+    with open_output(filename, 'rt', newline='') as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)  # excludes the header
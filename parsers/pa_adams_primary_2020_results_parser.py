@@ -1,8 +1,7 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
-from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
-    ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
+from parsers.electionware_parser import pdf_to_csv, REQUIRED_VOTE_PERCENT, ElectionwareCountyProfile, \
+    compile_county_profile
 
 COUNTY = 'Adams'
 
@@ -37,6 +36,8 @@ OPENELECTIONS_MAPPED_HEADER = [
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 06/19/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+CANDIDATES_WITHOUT_VOTE_PERCENT = ('Contest Totals',)
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'President of the United States': ('President', ''),
     'Rep in Congress - 13th Dist': ('U.S. House', 13),
@@ -46,38 +47,28 @@ RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
 }
 
 
-class AdamsPDFStringIterator(ElectionwarePDFStringIterator):
-    _first_footer_substring = FIRST_FOOTER_SUBSTRING
-    _second_footer_substring = SECOND_FOOTER_SUBSTRING
-
-
-class AdamsPDFTableParser(ElectionwarePDFTableParser):
-    _county = COUNTY
-    _expected_table_headers = EXPECTED_TABLE_HEADERS
-    _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
-    _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
+ADAMS_PROFILE = ElectionwareCountyProfile(
+    county=COUNTY,
+    header=ADAMS_HEADER,
+    footer_substrings=(FIRST_FOOTER_SUBSTRING, SECOND_FOOTER_SUBSTRING),
+    expected_table_headers=EXPECTED_TABLE_HEADERS,
+    openelections_mapped_header=OPENELECTIONS_MAPPED_HEADER,
+    raw_office_to_office_and_district=RAW_OFFICE_TO_OFFICE_AND_DISTRICT,
+    has_vote_percent_header=True,
+    trailing_vote_percent=REQUIRED_VOTE_PERCENT,
+    candidates_without_vote_percent=CANDIDATES_WITHOUT_VOTE_PERCENT,
+)
 
-    def _verify_table_header(self):
-        if self._office != 'STATISTICS':
-            vote_percent_header = next(self._string_iterator)
-            assert vote_percent_header == 'VOTE %'
-        super()._verify_table_header()
+AdamsPDFPageParser = compile_county_profile(ADAMS_PROFILE, __name__)
 
-    def _populate_votes(self, row):
-        super()._populate_votes(row)
-        if self._office != 'STATISTICS' and row['candidate'] != 'Contest Totals':
-            vote_percent_string = next(self._string_iterator)
-            assert '%' in vote_percent_string
 
-
-class AdamsPDFPageParser(ElectionwarePDFPageParser):
-    _pdf_string_iterator_clazz = AdamsPDFStringIterator
-    _pdf_table_parser_clazz = AdamsPDFTableParser
-    _header = ADAMS_HEADER
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(ADAMS_FILE),
+                   csv_writer,
+                   AdamsPDFPageParser,
+                   checkpoint=checkpoint)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(ADAMS_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   AdamsPDFPageParser)
+    convert()
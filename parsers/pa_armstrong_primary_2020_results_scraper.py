@@ -1,10 +1,13 @@
-import csv
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import os
+from queue import Queue
 import requests
 from io import BytesIO
-from pdfreader import SimplePDFViewer
-from time import sleep
+from threading import Event
+from time import monotonic
 from parsers.pa_pdf_parser import PDFPageIterator, PDFStringIterator
+from parsers.pdf_backends import open_pdf_backend
+from parsers.output_sinks import open_output_sink
 
 COUNTY = 'Armstrong'
 
@@ -15,6 +18,7 @@ ARMSTRONG_URL = 'https://co.armstrong.pa.us/images/resources/electionresults/off
 FIRST_PRECINCT_ID = 1
 LAST_PRECINCT_ID = 62
 QUERY_SPACING_IN_SECONDS = 3
+PARSE_WORKERS = os.cpu_count() or 1
 
 
 GENERIC_TABLE_HEADER_FIELD = 'Total'
@@ -68,10 +72,10 @@ class ArmstrongPDFStringIterator(PDFStringIterator):
 
 
 class ArmstrongPDFPageIterator(PDFPageIterator):
-    def __init__(self, precinct_id):
+    def __init__(self, pdf_content):
         super().__init__(filename=None)
-        response = requests.get(ARMSTRONG_URL.format(precinct_id))
-        self._pdf_viewer = SimplePDFViewer(BytesIO(response.content))
+        self._f = BytesIO(pdf_content)
+        self._pdf_backend = open_pdf_backend(self._f)
 
 
 class ArmstrongPDFTableParser:
@@ -252,8 +256,14 @@ def extract_first_page_data(page):
     return precinct, ballots_cast, registered_voters
 
 
-def process_pdf(precinct_id):
-    pdf_page_iterator = ArmstrongPDFPageIterator(precinct_id)
+def download_pdf(precinct_id):
+    response = requests.get(ARMSTRONG_URL.format(precinct_id))
+    response.raise_for_status()
+    return response.content
+
+
+def process_pdf(precinct_id, pdf_content):
+    pdf_page_iterator = ArmstrongPDFPageIterator(pdf_content)
     page_one = next(pdf_page_iterator)
     precinct, ballots_cast, registered_voters = extract_first_page_data(page_one)
     yield {'county': COUNTY, 'precinct': precinct, 'office': 'Ballots Cast', 'votes': ballots_cast}
@@ -271,14 +281,48 @@ def process_pdf(precinct_id):
         yield row
 
 
-def pdfs_to_csv(csv_writer):
+def parse_pdf(precinct_id, pdf_content):
+    # write-in votes only carry over between the pages of one precinct's pdf,
+    # so each precinct can be parsed by a different worker
+    return list(process_pdf(precinct_id, pdf_content))
+
+
+def download_pdfs(parse_executor, pending_precincts, stopped):
+    # starts each download at least `QUERY_SPACING_IN_SECONDS` after the
+    # previous one and hands the pdf to the parser workers straight away,
+    # until `stopped` is set; `None` marks the end of the queue, even if a
+    # download fails
+    try:
+        next_query_time = monotonic()
+        for precinct_id in range(FIRST_PRECINCT_ID, LAST_PRECINCT_ID + 1):
+            if stopped.wait(max(next_query_time - monotonic(), 0)):
+                return
+            next_query_time = monotonic() + QUERY_SPACING_IN_SECONDS
+            pdf_content = download_pdf(precinct_id)
+            pending_precincts.put(parse_executor.submit(parse_pdf, precinct_id, pdf_content))
+    finally:
+        pending_precincts.put(None)
+
+
+def pdfs_to_csv(csv_writer, workers=PARSE_WORKERS):
     csv_writer.writeheader()
-    for precinct_id in range(FIRST_PRECINCT_ID, LAST_PRECINCT_ID + 1):
-        for row in process_pdf(precinct_id):
-            csv_writer.writerow(row)
-        sleep(QUERY_SPACING_IN_SECONDS)
+    pending_precincts = Queue()
+    stopped = Event()
+    with ProcessPoolExecutor(workers) as parse_executor, ThreadPoolExecutor(1) as download_executor:
+        downloader = download_executor.submit(download_pdfs, parse_executor, pending_precincts, stopped)
+        try:
+            # precincts are queued in order, so rows are written in precinct order
+            for parsed_precinct in iter(pending_precincts.get, None):
+                csv_writer.writerows(parsed_precinct.result())
+            downloader.result()
+        except BaseException:
+            # a failed precinct stops the remaining downloads and queued parses,
+            # so leaving the executors does not wait for them
+            stopped.set()
+            parse_executor.shutdown(cancel_futures=True)
+            raise
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdfs_to_csv(csv.DictWriter(f, OUTPUT_HEADER))
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
+        pdfs_to_csv(csv_writer)
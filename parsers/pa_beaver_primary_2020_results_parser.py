@@ -1,8 +1,7 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
-from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
-    ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
+from parsers.electionware_parser import pdf_to_csv, ElectionwareCountyProfile, \
+    compile_county_profile
 
 COUNTY = 'Beaver'
 
@@ -32,6 +31,8 @@ OPENELECTIONS_MAPPED_HEADER = [
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 06/11/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICE_SUBSTRINGS = ('Delegate', 'Del ', 'Comm')
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'REP IN THE GENERAL ASSEMBLY 10TH DIST': ('General Assembly', 10),
@@ -46,40 +47,28 @@ RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
 }
 
 
-class BeaverPDFStringIterator(ElectionwarePDFStringIterator):
-    _first_footer_substring = FIRST_FOOTER_SUBSTRING
-    _second_footer_substring = SECOND_FOOTER_SUBSTRING
-
-
-class BeaverPDFTableParser(ElectionwarePDFTableParser):
-    _county = COUNTY
-    _expected_table_headers = EXPECTED_TABLE_HEADERS
-    _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
-    _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
+BEAVER_PROFILE = ElectionwareCountyProfile(
+    county=COUNTY,
+    header=BEAVER_HEADER,
+    footer_substrings=(FIRST_FOOTER_SUBSTRING, SECOND_FOOTER_SUBSTRING),
+    expected_table_headers=EXPECTED_TABLE_HEADERS,
+    openelections_mapped_header=OPENELECTIONS_MAPPED_HEADER,
+    raw_office_to_office_and_district=RAW_OFFICE_TO_OFFICE_AND_DISTRICT,
+    title_case_offices=True,
+    title_case_candidates=True,
+    skipped_office_substrings=SKIPPED_OFFICE_SUBSTRINGS,
+)
 
-    @classmethod
-    def _clean_row(cls, row):
-        super()._clean_row(row)
-        row['office'] = row['office'].title()
-        row['candidate'] = row['candidate'].title()
+BeaverPDFPageParser = compile_county_profile(BEAVER_PROFILE, __name__)
 
-    @classmethod
-    def _should_be_recorded(cls, row):
-        if 'Del ' in row['office']:
-            return False
-        if 'Comm' in row['office']:
-            return False
-        return super()._should_be_recorded(row)
 
-
-class BeaverPDFPageParser(ElectionwarePDFPageParser):
-    _pdf_string_iterator_clazz = BeaverPDFStringIterator
-    _pdf_table_parser_clazz = BeaverPDFTableParser
-    _header = BEAVER_HEADER
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(BEAVER_FILE),
+                   csv_writer,
+                   BeaverPDFPageParser,
+                   checkpoint=checkpoint)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(BEAVER_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   BeaverPDFPageParser)
+    convert()
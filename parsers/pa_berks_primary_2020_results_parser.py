@@ -1,8 +1,8 @@
 from collections import namedtuple
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator, PDFStringIterator
+from parsers.pa_pdf_parser import ParallelPDFPageIterator, PDFStringIterator, parse_pdf_pages_to_csv
 from parsers.constants.pa_candidates_2020 import STATEWIDE_PRIMARY_CANDIDATES
+from parsers.output_sinks import open_output_sink
 
 
 # Uses Electionware Precinct Report PDF format
@@ -301,15 +301,14 @@ class BerksPDFPageParser:
         return self._table_body_parser and self._table_body_parser.page_is_done()
 
 
-def pdf_to_csv(pdf, csv_writer):
-    csv_writer.writeheader()
-    for page in pdf:
-        print(f'processing page {page.get_page_number()}')
-        pdf_page_parser = BerksPDFPageParser(page)
-        for row in pdf_page_parser:
-            csv_writer.writerow(row._asdict())
+def pdf_to_csv(pdf, csv_writer, metrics=None):
+    def parse_page(page, continuation_state):
+        yield from BerksPDFPageParser(page)
+        return ()
+
+    parse_pdf_pages_to_csv(pdf, csv_writer, parse_page, metrics=metrics)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(BERKS_FILE), csv.DictWriter(f, OUTPUT_HEADER))
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
+        pdf_to_csv(ParallelPDFPageIterator(BERKS_FILE), csv_writer)
@@ -1,6 +1,5 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
 from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
     ElectionwarePDFTableParser, ElectionwarePDFPageParser
 
@@ -35,6 +34,8 @@ OPENELECTIONS_MAPPED_HEADER = [
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 06/11/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICE_SUBSTRINGS = ('Delegate', 'Comm')
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'REPRESENTATIVE IN THE GENERAL ASSEMBLY 79TH DISTRICT': ('General Assembly', 79),
@@ -53,6 +54,7 @@ class BlairPDFTableParser(ElectionwarePDFTableParser):
     _expected_table_headers = EXPECTED_TABLE_HEADERS
     _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
     _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
+    _skipped_office_substrings = SKIPPED_OFFICE_SUBSTRINGS
 
     def _verify_table_header(self):
         if self._office != 'STATISTICS':
@@ -80,10 +82,6 @@ class BlairPDFTableParser(ElectionwarePDFTableParser):
         if row['candidate'].startswith('Write-In: '):
             # there's already a Write-In Totals field; this prevents double counting
             return False
-        if 'Delegate' in row['office']:
-            return False
-        if 'Comm' in row['office']:
-            return False
         return super()._should_be_recorded(row)
 
 
@@ -93,8 +91,13 @@ class BlairPDFPageParser(ElectionwarePDFPageParser):
     _header = BLAIR_HEADER
 
 
-if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
         pdf_to_csv(PDFPageIterator(BLAIR_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   BlairPDFPageParser)
+                   csv_writer,
+                   BlairPDFPageParser,
+                   checkpoint=checkpoint)
+
+
+if __name__ == "__main__":
+    convert()
@@ -1,8 +1,7 @@
-from collections import defaultdict, namedtuple
-import csv
+from collections import namedtuple
 import os
 from parsers.pa_pdf_parser import PDFPageIterator, PDFPageParser,\
-    TableBodyParser, TableHeaderParser, TableHeader, pdf_to_csv
+    TableBodyParser, TableHeaderParser, TableHeader, open_checkpointed_output, pdf_to_csv
 from parsers.constants.pa_candidates_2020 import STATEWIDE_PRIMARY_CANDIDATES
 
 
@@ -194,20 +193,21 @@ class BradfordTableHeaderParser(TableHeaderParser):
 
 
 class BradfordTableBodyParser(TableBodyParser):
+    def __init__(self, string_iterator, table_headers):
+        super().__init__(string_iterator, table_headers)
+        self._jurisdiction_votes = self._new_jurisdiction_votes(len(VOTE_CATEGORIES))
+
     def iterate_jurisdiction_fields(self):
-        candidate_data_to_category_votes = defaultdict(list)
-        self._populate_category_votes(candidate_data_to_category_votes)
-        yield from self._process_category_votes(candidate_data_to_category_votes)
+        self._populate_category_votes(self._jurisdiction_votes)
+        yield from self._process_category_votes(self._jurisdiction_votes)
 
-    def _populate_category_votes(self, candidate_data_to_category_votes):
-        for category in VOTE_CATEGORIES:
+    def _populate_category_votes(self, jurisdiction_votes):
+        for category_index, category in enumerate(VOTE_CATEGORIES):
             self._parse_category_cell(category)
-            for candidate_data in self._table_headers:
-                self._populate_jurisdiction_data(candidate_data_to_category_votes, candidate_data)
+            self._populate_jurisdiction_votes(jurisdiction_votes, category_index)
 
-    def _process_category_votes(self, candidate_data_to_category_votes):
-        for candidate_data in candidate_data_to_category_votes:
-            category_votes = candidate_data_to_category_votes[candidate_data]
+    def _process_category_votes(self, jurisdiction_votes):
+        for candidate_data, category_votes in self._iterate_jurisdiction_votes(jurisdiction_votes):
             row = self._generate_row(candidate_data, category_votes)
             office_is_invalid = max(invalid_office in row.office for invalid_office in INVALID_OFFICES)
             if not office_is_invalid:
@@ -234,5 +234,8 @@ class BradfordPDFPageParser(PDFPageParser):
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(BRADFORD_FILE), csv.DictWriter(f, OUTPUT_HEADER), BradfordPDFPageParser)
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(BRADFORD_FILE),
+                   csv_writer,
+                   BradfordPDFPageParser,
+                   checkpoint=checkpoint)
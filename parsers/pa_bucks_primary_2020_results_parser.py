@@ -1,6 +1,6 @@
 import os
-import csv
-from parsers.pa_pdf_parser import PDFStringIterator, PDFPageIterator
+from parsers.pa_pdf_parser import PDFStringIterator, ParallelPDFPageIterator, ResultRow, open_checkpointed_output, \
+    parse_pdf_pages_to_csv
 
 COUNTY = 'BUCKS'
 
@@ -86,7 +86,7 @@ class BucksPDFPageParser:
     def _iterate_office_data(self):
         while self._table_header and not self._page_is_done():
             candidate = self._get_candidate()
-            row = {'county': COUNTY, 'precinct': self._precinct, 'candidate': candidate}
+            row = ResultRow(county=COUNTY, precinct=self._precinct, candidate=candidate)
             self._populate_vote_data(row)
             if candidate == LAST_ROW_CANDIDATE:
                 self._table_header = None
@@ -158,20 +158,19 @@ class BucksPDFPageParser:
         return True
 
 
-def pdf_to_csv(pdf, csv_writer):
-    csv_writer.writeheader()
-    previous_table_header = None
-    previous_precinct = None
-    for page in pdf:
-        print(f'processing page {page.get_page_number()}')
-        pdf_page_parser = BucksPDFPageParser(page, previous_table_header, previous_precinct)
-        for row in pdf_page_parser:
-            csv_writer.writerow(row)
-        previous_table_header = pdf_page_parser.get_continued_table_header()
-        previous_precinct = pdf_page_parser.get_continued_precinct()
+def pdf_to_csv(pdf, csv_writer, continued_table_header=None, continued_precinct=None, checkpoint=None,
+               metrics=None):
+    def parse_page(page, continuation_state):
+        pdf_page_parser = BucksPDFPageParser(page, *continuation_state)
+        yield from pdf_page_parser
+        return pdf_page_parser.get_continued_table_header(), pdf_page_parser.get_continued_precinct()
+
+    return parse_pdf_pages_to_csv(pdf, csv_writer, parse_page, (continued_table_header, continued_precinct),
+                                  checkpoint=checkpoint, metrics=metrics)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(BUCKS_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER))
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(ParallelPDFPageIterator(BUCKS_FILE),
+                   csv_writer,
+                   checkpoint=checkpoint)
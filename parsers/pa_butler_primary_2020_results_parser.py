@@ -1,6 +1,6 @@
-import csv
 import os
 from lxml import html
+from parsers.output_sinks import open_output_sink
 
 COUNTY = 'Butler'
 
@@ -151,5 +151,5 @@ if __name__ == "__main__":
         report_html_string = f_in.read()
         html_tree = html.fromstring(report_html_string)
         html_tables = html_tree.xpath(f'//table')
-        with open(OUTPUT_FILE, 'w', newline='') as f_out:
-            html_tables_to_csv(html_tables, csv.DictWriter(f_out, OUTPUT_HEADER))
+        with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
+            html_tables_to_csv(html_tables, csv_writer)
@@ -1,8 +1,7 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
-from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
-    ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
+from parsers.electionware_parser import pdf_to_csv, ElectionwareCountyProfile, \
+    compile_county_profile
 
 COUNTY = 'Cambria'
 
@@ -59,32 +58,27 @@ RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
 }
 
 
-class CambriaPDFStringIterator(ElectionwarePDFStringIterator):
-    _first_footer_substring = FIRST_FOOTER_SUBSTRING
-    _second_footer_substring = SECOND_FOOTER_SUBSTRING
+CAMBRIA_PROFILE = ElectionwareCountyProfile(
+    county=COUNTY,
+    header=CAMBRIA_HEADER,
+    footer_substrings=(FIRST_FOOTER_SUBSTRING, SECOND_FOOTER_SUBSTRING),
+    expected_table_headers=EXPECTED_TABLE_HEADERS,
+    openelections_mapped_header=OPENELECTIONS_MAPPED_HEADER,
+    raw_office_to_office_and_district=RAW_OFFICE_TO_OFFICE_AND_DISTRICT,
+    title_case_offices=True,
+    title_case_candidates=True,
+)
 
+CambriaPDFPageParser = compile_county_profile(CAMBRIA_PROFILE, __name__)
 
-class CambriaPDFTableParser(ElectionwarePDFTableParser):
-    _county = COUNTY
-    _expected_table_headers = EXPECTED_TABLE_HEADERS
-    _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
-    _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
 
-    @classmethod
-    def _clean_row(cls, row):
-        super()._clean_row(row)
-        row['office'] = row['office'].title()
-        row['candidate'] = row['candidate'].title()
-
-
-class CambriaPDFPageParser(ElectionwarePDFPageParser):
-    _pdf_string_iterator_clazz = CambriaPDFStringIterator
-    _pdf_table_parser_clazz = CambriaPDFTableParser
-    _header = CAMBRIA_HEADER
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(CAMBRIA_FILE),
+                   csv_writer,
+                   CambriaPDFPageParser,
+                   checkpoint=checkpoint)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(CAMBRIA_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   CambriaPDFPageParser)
+    convert()
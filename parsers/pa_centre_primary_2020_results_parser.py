@@ -1,8 +1,7 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
-from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
-    ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
+from parsers.electionware_parser import pdf_to_csv, OPTIONAL_VOTE_PERCENT, ElectionwareCountyProfile, \
+    compile_county_profile
 
 COUNTY = 'Centre'
 
@@ -44,49 +43,29 @@ RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
 }
 
 
-class CentrePDFStringIterator(ElectionwarePDFStringIterator):
-    _first_footer_substring = FIRST_FOOTER_SUBSTRING
-    _second_footer_substring = SECOND_FOOTER_SUBSTRING
+CENTRE_PROFILE = ElectionwareCountyProfile(
+    county=COUNTY,
+    header=CENTRE_HEADER,
+    footer_substrings=(FIRST_FOOTER_SUBSTRING, SECOND_FOOTER_SUBSTRING),
+    expected_table_headers=EXPECTED_TABLE_HEADERS,
+    openelections_mapped_header=OPENELECTIONS_MAPPED_HEADER,
+    raw_office_to_office_and_district=RAW_OFFICE_TO_OFFICE_AND_DISTRICT,
+    title_case_offices=True,
+    title_case_candidates=True,
+    has_vote_percent_header=True,
+    trailing_vote_percent=OPTIONAL_VOTE_PERCENT,
+)
 
+CentrePDFPageParser = compile_county_profile(CENTRE_PROFILE, __name__)
 
-class CentrePDFTableParser(ElectionwarePDFTableParser):
-    _county = COUNTY
-    _expected_table_headers = EXPECTED_TABLE_HEADERS
-    _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
-    _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
 
-    def _verify_table_header(self):
-        if self._office != 'STATISTICS':
-            vote_percent_header = next(self._string_iterator)
-            assert vote_percent_header == 'VOTE %'
-        super()._verify_table_header()
-
-    def _populate_votes(self, row):
-        super()._populate_votes(row)
-        if '%' in self._string_iterator.peek():
-            next(self._string_iterator)  # vote % string, not always supplied
-
-    @classmethod
-    def _clean_row(cls, row):
-        super()._clean_row(row)
-        row['office'] = row['office'].title()
-        row['candidate'] = row['candidate'].title()
-
-    @classmethod
-    def _should_be_recorded(cls, row):
-        if 'Delegate' in row['office']:
-            return False
-        return super()._should_be_recorded(row)
-
-
-class CentrePDFPageParser(ElectionwarePDFPageParser):
-    _pdf_string_iterator_clazz = CentrePDFStringIterator
-    _pdf_table_parser_clazz = CentrePDFTableParser
-    _header = CENTRE_HEADER
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(CENTRE_FILE),
+                   csv_writer,
+                   CentrePDFPageParser,
+                   checkpoint=checkpoint)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(CENTRE_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   CentrePDFPageParser)
+    convert()
@@ -1,8 +1,7 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
-from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
-    ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
+from parsers.electionware_parser import pdf_to_csv, OPTIONAL_VOTE_PERCENT, ElectionwareCountyProfile, \
+    compile_county_profile
 
 COUNTY = 'Chester'
 
@@ -46,6 +45,8 @@ OPENELECTIONS_MAPPED_HEADER = [
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 07/02/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICE_SUBSTRINGS = ('Delegate', 'Committee', 'Liquor', 'Council')
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'REPRESENTATIVE IN THE GENERAL ASSEMBLY 13TH DISTRICT': ('General Assembly', 13),
@@ -63,55 +64,30 @@ RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
 }
 
 
-class ChesterPDFStringIterator(ElectionwarePDFStringIterator):
-    _first_footer_substring = FIRST_FOOTER_SUBSTRING
-    _second_footer_substring = SECOND_FOOTER_SUBSTRING
-
-
-class ChesterPDFTableParser(ElectionwarePDFTableParser):
-    _county = COUNTY
-    _expected_table_headers = EXPECTED_TABLE_HEADERS
-    _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
-    _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
-
-    def _verify_table_header(self):
-        if self._office != 'STATISTICS':
-            vote_percent_header = next(self._string_iterator)
-            assert vote_percent_header == 'VOTE %'
-        super()._verify_table_header()
+CHESTER_PROFILE = ElectionwareCountyProfile(
+    county=COUNTY,
+    header=CHESTER_HEADER,
+    footer_substrings=(FIRST_FOOTER_SUBSTRING, SECOND_FOOTER_SUBSTRING),
+    expected_table_headers=EXPECTED_TABLE_HEADERS,
+    openelections_mapped_header=OPENELECTIONS_MAPPED_HEADER,
+    raw_office_to_office_and_district=RAW_OFFICE_TO_OFFICE_AND_DISTRICT,
+    title_case_offices=True,
+    title_case_candidates=True,
+    has_vote_percent_header=True,
+    trailing_vote_percent=OPTIONAL_VOTE_PERCENT,
+    skipped_office_substrings=SKIPPED_OFFICE_SUBSTRINGS,
+)
 
-    def _populate_votes(self, row):
-        super()._populate_votes(row)
-        if '%' in self._string_iterator.peek():
-            next(self._string_iterator)  # vote % string
+ChesterPDFPageParser = compile_county_profile(CHESTER_PROFILE, __name__)
 
-    @classmethod
-    def _clean_row(cls, row):
-        super()._clean_row(row)
-        row['office'] = row['office'].title()
-        row['candidate'] = row['candidate'].title()
 
-    @classmethod
-    def _should_be_recorded(cls, row):
-        if 'Delegate' in row['office']:
-            return False
-        if 'Committee' in row['office']:
-            return False
-        if 'Liquor' in row['office']:
-            return False
-        if 'Council' in row['office']:
-            return False
-        return super()._should_be_recorded(row)
-
-
-class ChesterPDFPageParser(ElectionwarePDFPageParser):
-    _pdf_string_iterator_clazz = ChesterPDFStringIterator
-    _pdf_table_parser_clazz = ChesterPDFTableParser
-    _header = CHESTER_HEADER
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(CHESTER_FILE),
+                   csv_writer,
+                   ChesterPDFPageParser,
+                   checkpoint=checkpoint)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(CHESTER_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   ChesterPDFPageParser)
+    convert()
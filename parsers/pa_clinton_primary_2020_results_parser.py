@@ -1,6 +1,5 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
 from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
     ElectionwarePDFTableParser, ElectionwarePDFPageParser
 
@@ -29,6 +28,8 @@ EXPECTED_TABLE_HEADERS = (' '.join(TABLE_HEADER),)
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 06/19/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICE_SUBSTRINGS = ('Delegate', 'Del ', 'Cmte')
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'REP IN CONGRESS 12TH DISTRICT': ('U.S. House', 12),
@@ -52,6 +53,7 @@ class ClintonPDFTableParser(ElectionwarePDFTableParser):
     _expected_table_headers = EXPECTED_TABLE_HEADERS
     _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
     _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
+    _skipped_office_substrings = SKIPPED_OFFICE_SUBSTRINGS
 
     def _populate_votes(self, row):
         super()._populate_votes(row)
@@ -71,10 +73,6 @@ class ClintonPDFTableParser(ElectionwarePDFTableParser):
         if row['candidate'].startswith('Write-In: '):
             # there's already a Write-In Totals field; this prevents double counting
             return False
-        if 'Del ' in row['office']:
-            return False
-        if 'Cmte' in row['office']:
-            return False
         return super()._should_be_recorded(row)
 
 
@@ -84,8 +82,13 @@ class ClintonPDFPageParser(ElectionwarePDFPageParser):
     _header = CLINTON_HEADER
 
 
-if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
         pdf_to_csv(PDFPageIterator(CLINTON_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   ClintonPDFPageParser)
+                   csv_writer,
+                   ClintonPDFPageParser,
+                   checkpoint=checkpoint)
+
+
+if __name__ == "__main__":
+    convert()
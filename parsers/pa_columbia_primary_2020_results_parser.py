@@ -1,8 +1,7 @@
-from collections import defaultdict, namedtuple
-import csv
+from collections import namedtuple
 import os
 from parsers.pa_pdf_parser import PDFPageIterator, PDFPageParser,\
-    TableBodyParser, TableHeaderParser, TableHeader, pdf_to_csv
+    TableBodyParser, TableHeaderParser, TableHeader, open_checkpointed_output, pdf_to_csv
 from parsers.constants.pa_candidates_2020 import STATEWIDE_PRIMARY_CANDIDATES
 
 
@@ -155,18 +154,16 @@ class ColumbiaTableHeaderParser(TableHeaderParser):
 
 
 class ColumbiaTableBodyParser(TableBodyParser):
-    def iterate_jurisdiction_fields(self):
-        candidate_data_to_votes = defaultdict(list)
-        self._populate_votes(candidate_data_to_votes)
-        yield from self._process_votes(candidate_data_to_votes)
+    def __init__(self, string_iterator, table_headers):
+        super().__init__(string_iterator, table_headers)
+        self._jurisdiction_votes = self._new_jurisdiction_votes()
 
-    def _populate_votes(self, candidate_data_to_votes):
-        for candidate_data in self._table_headers:
-            self._populate_jurisdiction_data(candidate_data_to_votes, candidate_data)
+    def iterate_jurisdiction_fields(self):
+        self._populate_jurisdiction_votes(self._jurisdiction_votes)
+        yield from self._process_votes(self._jurisdiction_votes)
 
-    def _process_votes(self, candidate_data_to_votes):
-        for candidate_data in candidate_data_to_votes:
-            votes = candidate_data_to_votes[candidate_data]
+    def _process_votes(self, jurisdiction_votes):
+        for candidate_data, votes in self._iterate_jurisdiction_votes(jurisdiction_votes):
             row_data = [COUNTY, self._jurisdiction] + list(candidate_data) + votes
             row = ParsedRow(*row_data)
             office_is_invalid = sum(invalid_office in row.office for invalid_office in INVALID_OFFICES)
@@ -189,5 +186,8 @@ class ColumbiaPDFPageIterator(PDFPageIterator):
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-            pdf_to_csv(ColumbiaPDFPageIterator(COLUMBIA_FILE), csv.DictWriter(f, OUTPUT_HEADER), ColumbiaPDFPageParser)
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(ColumbiaPDFPageIterator(COLUMBIA_FILE),
+                   csv_writer,
+                   ColumbiaPDFPageParser,
+                   checkpoint=checkpoint)
@@ -1,8 +1,8 @@
-import csv
 import os
 from parsers.pa_pdf_parser import PDFPageIterator
 from parsers.electionware_parser import ElectionwarePDFStringIterator, \
     ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.output_sinks import open_output_sink
 
 COUNTY = 'Cumberland'
 
@@ -50,6 +50,8 @@ OPENELECTIONS_MAPPED_HEADER = [
 FIRST_FOOTER_SUBSTRING = 'Precinct Report'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICE_SUBSTRINGS = ('Delegate', 'Committee')
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'REPRESENTATIVE IN CONGRESS 10TH DISTRICT': ('U.S. House', 10),
@@ -75,14 +77,7 @@ class CumberlandPDFTableParser(ElectionwarePDFTableParser):
     _expected_table_headers = EXPECTED_TABLE_HEADERS
     _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
     _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
-
-    @classmethod
-    def _should_be_recorded(cls, row):
-        if not super()._should_be_recorded(row):
-            return False
-        if 'Committee' in row['office'] or 'Delegate' in row['office']:
-            return False
-        return True
+    _skipped_office_substrings = SKIPPED_OFFICE_SUBSTRINGS
 
     @classmethod
     def _clean_row(cls, row):
@@ -104,19 +99,28 @@ class CumberlandPDFPageParser(ElectionwarePDFPageParser):
         assert header == self._party_header
 
 
-def append_pdf_to_csv(pdf_page_iterator, csv_writer, party):
+def parse_party_page(page, party):
+    # registration and turnout rows are in both parties' pdfs, so they are
+    # only kept from the Republican one
     party_abbrev = party[:3].upper()
+    for row in CumberlandPDFPageParser(page, party.upper()):
+        if row['party']:
+            assert row['party'] == party_abbrev
+        else:
+            assert row['office'] in ('Registered Voters', 'Ballots Cast')
+            if party_abbrev == 'DEM':
+                continue
+        yield row
+
+
+# electionware_shards binds each pdf's `party` to this, from its --party flag
+SHARDED_PAGE_PARSER = parse_party_page
+
+
+def append_pdf_to_csv(pdf_page_iterator, csv_writer, party):
     for page in pdf_page_iterator:
-        print(f'processing {party_abbrev} pdf, page {page.get_page_number()}')
-        pdf_page_parser = CumberlandPDFPageParser(page, party.upper())
-        for row in pdf_page_parser:
-            if row['party']:
-                assert row['party'] == party_abbrev
-            else:
-                assert row['office'] in ('Registered Voters', 'Ballots Cast')
-                if party_abbrev == 'DEM':
-                    continue  # processed once already, on REP side
-            csv_writer.writerow(row)
+        print(f'processing {party[:3].upper()} pdf, page {page.get_page_number()}')
+        csv_writer.writerows(parse_party_page(page, party))
 
 
 def pdfs_to_csv(csv_writer):
@@ -127,6 +131,10 @@ def pdfs_to_csv(csv_writer):
         append_pdf_to_csv(pdf_page_iterator, csv_writer, party)
 
 
+def convert():
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
+        pdfs_to_csv(csv_writer)
+
+
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdfs_to_csv(csv.DictWriter(f, OUTPUT_HEADER))
+    convert()
@@ -1,8 +1,8 @@
-import csv
 import os
 import requests
 from lxml import html
 from time import sleep
+from parsers.output_sinks import open_output_sink
 
 COUNTY = 'Dauphin'
 
@@ -73,8 +73,7 @@ def iterate_html_races():
 
 
 def html_races_to_csv():
-    with open(OUTPUT_FILE, 'w', newline='') as f_out:
-        csv_writer = csv.DictWriter(f_out, OUTPUT_HEADER)
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
         csv_writer.writeheader()
         for row in iterate_html_races():
             csv_writer.writerow(row)
@@ -1,8 +1,10 @@
-import csv
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import os
 import requests
 from lxml import html
-from time import sleep
+from parsers.output_sinks import open_output_sink
+from parsers.rate_limiter import RateLimiter
 
 COUNTY = 'Delaware'
 
@@ -12,10 +14,12 @@ OUTPUT_HEADER = ['county', 'precinct', 'office', 'district', 'party', 'candidate
 
 DELAWARE_REPORT_URLS = 'http://election.co.delaware.pa.us/eb/June_2020/reports/{}.html'
 PAGE_READ_THROTTLE_IN_SECONDS = 3
+FETCH_WORKERS = 4
+PARSE_WORKERS = os.cpu_count() or 1
 
 MAX_REPORT_ID = 429
 REPORT_ID_RANGE = range(1, MAX_REPORT_ID + 1)
-SKIPPED_REPORT_ID = 351
+SKIPPED_REPORT_IDS = (351,)
 
 PARTY_ABBREVIATIONS = {
     'Republican Party': 'REP',
@@ -102,15 +106,16 @@ class OfficeTableParser:
         return 'Delegate' not in office and 'Committee' not in office
 
 
-def get_report_html_tree(report_id):
-    report_url = DELAWARE_REPORT_URLS.format(report_id)
-    response = requests.get(report_url)
-    report_html_string = response.content.decode("utf-8")
-    return html.fromstring(report_html_string)
+def fetch_report_html(session, rate_limiter, report_id):
+    rate_limiter.wait()  # don't hammer the Delaware County website
+    print(f'Fetching precinct {report_id} of {MAX_REPORT_ID}')
+    response = session.get(DELAWARE_REPORT_URLS.format(report_id))
+    response.raise_for_status()
+    return response.content.decode("utf-8")
 
 
-def process_report(report_id):
-    report_html_tree = get_report_html_tree(report_id)
+def process_report(report_html_string):
+    report_html_tree = html.fromstring(report_html_string)
     precinct = report_html_tree.xpath(f'//td[@class="{PRECINCT_HTML_CLASS}"]/text()')[0]
     office_tables = report_html_tree.xpath(f'//table[@class="{OFFICE_TABLE_HTML_CLASS}"]')
     for office_table in office_tables:
@@ -120,20 +125,55 @@ def process_report(report_id):
             yield row
 
 
-def process_reports():
-    for report_id in REPORT_ID_RANGE:
-        print(f'Processing precinct {report_id} of {MAX_REPORT_ID}')
-        if report_id != SKIPPED_REPORT_ID:
-            yield from process_report(report_id)
-            sleep(PAGE_READ_THROTTLE_IN_SECONDS)  # don't hammer the Delaware County website
+def parse_report(report_html_string):
+    return list(process_report(report_html_string))
+
+
+def collect_parsed_report(report_id, parsed_report, skipped_reports):
+    try:
+        yield from parsed_report.result()
+    except Exception as e:
+        skipped_reports[report_id] = f'parse failed: {e!r}'
+
+
+def process_reports(skipped_reports, fetch_workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS):
+    # reports are fetched by a rate limited thread pool and parsed by a process
+    # pool, and their rows are yielded in report id order; a report that fails
+    # to download or parse is recorded in `skipped_reports` instead of ending the run
+    rate_limiter = RateLimiter(PAGE_READ_THROTTLE_IN_SECONDS)
+    report_ids = [report_id for report_id in REPORT_ID_RANGE if report_id not in SKIPPED_REPORT_IDS]
+    skipped_reports.update((report_id, 'listed in SKIPPED_REPORT_IDS') for report_id in SKIPPED_REPORT_IDS)
+    with requests.Session() as session, ThreadPoolExecutor(fetch_workers) as fetch_executor, \
+            ProcessPoolExecutor(parse_workers) as parse_executor:
+        fetches = [(report_id, fetch_executor.submit(fetch_report_html, session, rate_limiter, report_id))
+                   for report_id in report_ids]
+        pending_reports = deque()
+        for report_id, fetch in fetches:
+            try:
+                pending_reports.append((report_id, parse_executor.submit(parse_report, fetch.result())))
+            except Exception as e:
+                skipped_reports[report_id] = f'fetch failed: {e!r}'
+            while pending_reports and pending_reports[0][1].done():
+                yield from collect_parsed_report(*pending_reports.popleft(), skipped_reports)
+        while pending_reports:
+            yield from collect_parsed_report(*pending_reports.popleft(), skipped_reports)
+
+
+def print_skipped_reports(skipped_reports):
+    if skipped_reports:
+        print(f'Skipped {len(skipped_reports)} of {len(REPORT_ID_RANGE)} reports:')
+        for report_id, reason in sorted(skipped_reports.items()):
+            print(f'  {report_id}: {reason}')
 
 
 def html_reports_to_csv(csv_writer):
+    skipped_reports = {}
     csv_writer.writeheader()
-    for row in process_reports():
+    for row in process_reports(skipped_reports):
         csv_writer.writerow(row)
+    print_skipped_reports(skipped_reports)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        html_reports_to_csv(csv.DictWriter(f, OUTPUT_HEADER))
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
+        html_reports_to_csv(csv_writer)
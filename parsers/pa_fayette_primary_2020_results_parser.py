@@ -1,6 +1,6 @@
-import csv
 import openpyxl
 import os
+from parsers.output_sinks import open_output_sink
 
 COUNTY = 'Fayette'
 
@@ -146,9 +146,9 @@ def xlsx_to_csv(workbook, csv_writer):
 
 
 def main():
-    with open(OUTPUT_FILE, 'w', newline='') as f:
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
         xlsx_to_csv(openpyxl.load_workbook(FAYETTE_FILE),
-                    csv.DictWriter(f, OUTPUT_HEADER))
+                    csv_writer)
 
 
 if __name__ == "__main__":
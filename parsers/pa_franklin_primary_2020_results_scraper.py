@@ -1,12 +1,14 @@
-import csv
+import hashlib
+import json
 import os
 import requests
 from io import BytesIO
-from pdfreader import SimplePDFViewer
-from time import sleep
 from parsers.pa_pdf_parser import PDFPageIterator
+from parsers.pdf_backends import open_pdf_backend
 from parsers.electionware_parser import ElectionwarePDFStringIterator, \
     ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.output_sinks import open_output_sink
+from parsers.rate_limiter import RateLimiter
 
 COUNTY = 'Franklin'
 
@@ -16,7 +18,16 @@ OUTPUT_HEADER = ['county', 'precinct', 'office', 'district', 'party', 'candidate
 FRANKLIN_URL = 'https://portal.co.franklin.pa.us/Election%20Results/{}.pdf'
 FIRST_PRECINCT_ID = 1
 LAST_PRECINCT_ID = 73
+# every request is spaced, including ones the server answers with a 304
 QUERY_SPACING_IN_SECONDS = 3
+NOT_MODIFIED_STATUS_CODE = 304
+
+# bump whenever the parsing changes, so rows cached by older versions are
+# parsed again
+PARSER_VERSION = 1
+MANIFEST_FILE = os.environ.get(
+    'FRANKLIN_MANIFEST_FILE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'openelections-data-pa', 'franklin_manifest.json'))
 
 FRANKLIN_HEADER = [
     '',
@@ -36,6 +47,8 @@ OPENELECTIONS_MAPPED_HEADER = [
 
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICE_PREFIXES = ('Liquor License',)
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'CONGRESSIONAL REP 13TH DST': ('U.S. House', 13),
@@ -69,6 +82,7 @@ class FranklinPDFTableParser(ElectionwarePDFTableParser):
     _expected_table_headers = EXPECTED_TABLE_HEADERS
     _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
     _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
+    _skipped_office_prefixes = SKIPPED_OFFICE_PREFIXES
 
     def _verify_table_header(self):
         if self._office != 'STATISTICS':
@@ -98,8 +112,6 @@ class FranklinPDFTableParser(ElectionwarePDFTableParser):
             return False
         if row['candidate'] in INVALID_CANDIDATES:
             return False
-        if row['office'].startswith('Liquor License'):
-            return False
         return super()._should_be_recorded(row)
 
 
@@ -114,28 +126,90 @@ class FranklinPDFPageParser(ElectionwarePDFPageParser):
 
 
 class FranklinPDFPageIterator(PDFPageIterator):
-    def __init__(self, precinct_id_string):
+    def __init__(self, pdf_content):
         super().__init__(filename=None)
-        response = requests.get(FRANKLIN_URL.format(precinct_id_string))
-        self._pdf_viewer = SimplePDFViewer(BytesIO(response.content))
+        self._f = BytesIO(pdf_content)
+        self._pdf_backend = open_pdf_backend(self._f)
 
 
-def process_pdf(precinct_id_string):
-    pdf_page_iterator = FranklinPDFPageIterator(precinct_id_string)
+def process_pdf(precinct_id_string, pdf_content):
+    pdf_page_iterator = FranklinPDFPageIterator(pdf_content)
     for page in pdf_page_iterator:
         print(f'processing page {page.get_page_number()} of precinct {precinct_id_string}')
         yield from FranklinPDFPageParser(page, precinct_id_string)
 
 
-def pdfs_to_csv(csv_writer):
+def load_manifest(filename=MANIFEST_FILE):
+    # maps each precinct id string to the content hash, http validators and
+    # parsed rows of the last version of its pdf; a manifest written by
+    # another parser version is dropped entirely
+    try:
+        with open(filename) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('parser_version') != PARSER_VERSION:
+        return {}
+    return manifest['precincts']
+
+
+def save_manifest(manifest, filename=MANIFEST_FILE):
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    temp_filename = f'{filename}.{os.getpid()}.tmp'
+    with open(temp_filename, 'w') as f:
+        json.dump({'parser_version': PARSER_VERSION, 'precincts': manifest}, f, separators=(',', ':'))
+    os.replace(temp_filename, filename)
+
+
+def download_pdf(precinct_id_string, manifest_entry, rate_limiter):
+    # returns None when the server reports the pdf unchanged since it was last parsed
+    headers = {}
+    if manifest_entry.get('etag'):
+        headers['If-None-Match'] = manifest_entry['etag']
+    if manifest_entry.get('last_modified'):
+        headers['If-Modified-Since'] = manifest_entry['last_modified']
+    rate_limiter.wait()
+    response = requests.get(FRANKLIN_URL.format(precinct_id_string), headers=headers)
+    if response.status_code == NOT_MODIFIED_STATUS_CODE and 'rows' in manifest_entry:
+        return None
+    response.raise_for_status()  # never hash or parse an error page
+    return response
+
+
+def refresh_precinct(precinct_id_string, manifest_entry, rate_limiter):
+    # returns the precinct's new manifest entry and whether its pdf changed;
+    # only pdfs whose bytes changed are rendered and parsed again
+    response = download_pdf(precinct_id_string, manifest_entry, rate_limiter)
+    if response is None:
+        return manifest_entry, False
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    changed = manifest_entry.get('sha256') != content_hash
+    if changed:
+        rows = [row._asdict() for row in process_pdf(precinct_id_string, response.content)]
+    else:
+        rows = manifest_entry['rows']
+    return {'sha256': content_hash,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'rows': rows}, changed
+
+
+def pdfs_to_csv(csv_writer, manifest_filename=MANIFEST_FILE):
+    manifest = load_manifest(manifest_filename)
+    rate_limiter = RateLimiter(QUERY_SPACING_IN_SECONDS)
     csv_writer.writeheader()
     for precinct_id in range(FIRST_PRECINCT_ID, LAST_PRECINCT_ID + 1):
         precinct_id_string = f'{precinct_id:02}'
-        for row in process_pdf(precinct_id_string):
-            csv_writer.writerow(row)
-        sleep(QUERY_SPACING_IN_SECONDS)
+        previous_entry = manifest.get(precinct_id_string, {})
+        manifest_entry, _ = refresh_precinct(precinct_id_string, previous_entry, rate_limiter)
+        csv_writer.writerows(manifest_entry['rows'])
+        if manifest_entry != previous_entry:
+            # also saves new http validators for unchanged bytes, so the next
+            # run can get a 304 instead
+            manifest[precinct_id_string] = manifest_entry
+            save_manifest(manifest, manifest_filename)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdfs_to_csv(csv.DictWriter(f, OUTPUT_HEADER))
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
+        pdfs_to_csv(csv_writer)
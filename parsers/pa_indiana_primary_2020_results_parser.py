@@ -1,7 +1,7 @@
-import csv
 import os
 from parsers.constants.pa_candidates_2020 import STATEWIDE_PRIMARY_CANDIDATES
-from parsers.pa_pdf_parser import PDFPageIterator, PDFStringIterator
+from parsers.pa_pdf_parser import PDFPageIterator, PDFStringIterator, parse_pdf_pages_to_csv
+from parsers.output_sinks import open_output_sink
 
 
 COUNTY = 'Indiana'
@@ -899,17 +899,15 @@ class IndianaPDFPageParser:
         yield from self._table_body_parser
 
 
-def pdf_to_csv(pdf, csv_writer):
-    previous_table_header = None
-    csv_writer.writeheader()
-    for page in pdf:
-        print(f'processing page {page.get_page_number()}')
+def pdf_to_csv(pdf, csv_writer, metrics=None):
+    def parse_page(page, previous_table_header):
         pdf_page_parser = IndianaPDFPageParser(page, previous_table_header)
-        for row in pdf_page_parser:
-            csv_writer.writerow(row)
-        previous_table_header = pdf_page_parser.get_continued_table_header()
+        yield from pdf_page_parser
+        return pdf_page_parser.get_continued_table_header()
+
+    parse_pdf_pages_to_csv(pdf, csv_writer, parse_page, None, metrics=metrics)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(INDIANA_FILE), csv.DictWriter(f, OUTPUT_HEADER))
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
+        pdf_to_csv(PDFPageIterator(INDIANA_FILE), csv_writer)
@@ -1,8 +1,7 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
-from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
-    ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
+from parsers.electionware_parser import pdf_to_csv, ElectionwareCountyProfile, \
+    compile_county_profile
 
 COUNTY = 'Lackawanna'
 
@@ -59,31 +58,26 @@ RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
 }
 
 
-class LackawannaPDFStringIterator(ElectionwarePDFStringIterator):
-    _first_footer_substring = FIRST_FOOTER_SUBSTRING
-    _second_footer_substring = SECOND_FOOTER_SUBSTRING
+LACKAWANNA_PROFILE = ElectionwareCountyProfile(
+    county=COUNTY,
+    header=LACKAWANNA_HEADER,
+    footer_substrings=(FIRST_FOOTER_SUBSTRING, SECOND_FOOTER_SUBSTRING),
+    expected_table_headers=EXPECTED_TABLE_HEADERS,
+    openelections_mapped_header=OPENELECTIONS_MAPPED_HEADER,
+    raw_office_to_office_and_district=RAW_OFFICE_TO_OFFICE_AND_DISTRICT,
+    title_case_offices=True,
+)
 
+LackawannaPDFPageParser = compile_county_profile(LACKAWANNA_PROFILE, __name__)
 
-class LackawannaPDFTableParser(ElectionwarePDFTableParser):
-    _county = COUNTY
-    _expected_table_headers = EXPECTED_TABLE_HEADERS
-    _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
-    _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
 
-    @classmethod
-    def _clean_row(cls, row):
-        super()._clean_row(row)
-        row['office'] = row['office'].title()
-
-
-class LackawannaPDFPageParser(ElectionwarePDFPageParser):
-    _pdf_string_iterator_clazz = LackawannaPDFStringIterator
-    _pdf_table_parser_clazz = LackawannaPDFTableParser
-    _header = LACKAWANNA_HEADER
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(LACKAWANNA_FILE),
+                   csv_writer,
+                   LackawannaPDFPageParser,
+                   checkpoint=checkpoint)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(LACKAWANNA_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   LackawannaPDFPageParser)
+    convert()
@@ -1,8 +1,8 @@
-import csv
 import os
 import requests
 from lxml import html
 from time import sleep
+from parsers.output_sinks import open_output_sink
 
 
 COUNTY = 'Lancaster'
@@ -95,8 +95,7 @@ def extract_votes(vote_cell):
 
 
 def main():
-    with open(OUTPUT_FILE, 'w', newline='') as f_out:
-        csv_writer = csv.DictWriter(f_out, OUTPUT_HEADER)
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
         csv_writer.writeheader()
         for row in scrape_lancaster():
             csv_writer.writerow(row)
@@ -1,8 +1,7 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
-from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
-    ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
+from parsers.electionware_parser import pdf_to_csv, REQUIRED_VOTE_PERCENT, ElectionwareCountyProfile, \
+    compile_county_profile
 
 COUNTY = 'Lebanon'
 
@@ -26,6 +25,8 @@ EXPECTED_TABLE_HEADERS = (TABLE_HEADER,)
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 06/19/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICE_SUBSTRINGS = ('Delegate', 'Committee')
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'REPRESENTIVE IN CONGRESS 9TH DISTRICT': ('U.S. House', 9),
@@ -39,52 +40,30 @@ OPENELECTIONS_MAPPED_HEADER = [
 ]
 
 
-class LebanonPDFStringIterator(ElectionwarePDFStringIterator):
-    _first_footer_substring = FIRST_FOOTER_SUBSTRING
-    _second_footer_substring = SECOND_FOOTER_SUBSTRING
-
-
-class LebanonPDFTableParser(ElectionwarePDFTableParser):
-    _county = COUNTY
-    _expected_table_headers = EXPECTED_TABLE_HEADERS
-    _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
-    _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
-
-    def _verify_table_header(self):
-        if self._office != 'STATISTICS':
-            vote_percent_header = next(self._string_iterator)
-            assert vote_percent_header == 'VOTE %'
-        super()._verify_table_header()
+LEBANON_PROFILE = ElectionwareCountyProfile(
+    county=COUNTY,
+    header=LEBANON_HEADER,
+    footer_substrings=(FIRST_FOOTER_SUBSTRING, SECOND_FOOTER_SUBSTRING),
+    expected_table_headers=EXPECTED_TABLE_HEADERS,
+    openelections_mapped_header=OPENELECTIONS_MAPPED_HEADER,
+    raw_office_to_office_and_district=RAW_OFFICE_TO_OFFICE_AND_DISTRICT,
+    title_case_offices=True,
+    title_case_candidates=True,
+    has_vote_percent_header=True,
+    trailing_vote_percent=REQUIRED_VOTE_PERCENT,
+    skipped_office_substrings=SKIPPED_OFFICE_SUBSTRINGS,
+)
 
-    def _populate_votes(self, row):
-        super()._populate_votes(row)
-        if self._office != 'STATISTICS':
-            vote_percent_string = next(self._string_iterator)
-            assert '%' in vote_percent_string
+LebanonPDFPageParser = compile_county_profile(LEBANON_PROFILE, __name__)
 
-    @classmethod
-    def _clean_row(cls, row):
-        super()._clean_row(row)
-        row['office'] = row['office'].title()
-        row['candidate'] = row['candidate'].title()
 
-    @classmethod
-    def _should_be_recorded(cls, row):
-        if not super()._should_be_recorded(row):
-            return False
-        if 'Committee' in row['office']:
-            return False
-        return True
-
-
-class LebanonPDFPageParser(ElectionwarePDFPageParser):
-    _pdf_string_iterator_clazz = LebanonPDFStringIterator
-    _pdf_table_parser_clazz = LebanonPDFTableParser
-    _header = LEBANON_HEADER
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(LEBANON_FILE),
+                   csv_writer,
+                   LebanonPDFPageParser,
+                   checkpoint=checkpoint)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(LEBANON_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   LebanonPDFPageParser)
+    convert()
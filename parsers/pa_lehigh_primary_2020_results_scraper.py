@@ -1,9 +1,14 @@
-import csv
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import os
 import requests
 import urllib3
 from lxml import html
-from time import sleep
+from urllib.parse import urlsplit
+from parsers.output_sinks import open_output_sink
+from parsers.rate_limiter import AsyncRateLimiter
 
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -30,27 +35,106 @@ ELECTION_ID = '9b9b5c8bfcae482ca36cedc078916a4b'
 FEDERAL_CANDIDATES_CATEGORY_ID = '87108f63b7fb499aa2c4d216d14bcbe5'
 STATE_CANDIDATES_CATEGORY_ID = 'e0cc9809a21a403dbc5427e2ecd818e8'
 COUNTY_CANDIDATES_CATEGORY_ID = 'b1253fda2dd04239a834bd90163a78af'
+CANDIDATE_CATEGORY_IDS = (FEDERAL_CANDIDATES_CATEGORY_ID, STATE_CANDIDATES_CATEGORY_ID, COUNTY_CANDIDATES_CATEGORY_ID)
 LEHIGH_BASE_URL = f'https://home.lehighcounty.org/TallyHo'
-QUERY_SPACING_IN_SECONDS = 30  # don't spam requests; total process STATE_CANDIDATES_CATEGORY_ID be <50 queries
 
-
-def get_candidate_urls():
-    for category_id in [FEDERAL_CANDIDATES_CATEGORY_ID, STATE_CANDIDATES_CATEGORY_ID, COUNTY_CANDIDATES_CATEGORY_ID]:
-        url = f'{LEHIGH_BASE_URL}/ElectionResultsView.aspx?election={ELECTION_ID}&category={category_id}'
-        response = requests.get(url, verify=False)
-        html_tree = html.fromstring(response.content.decode('utf-8'))
-        yield from html_tree.xpath('//div[contains(@class, "col-districts-body")]/a/@href')
-
-
-def process_candidate_paths(candidate_paths):
-    for candidate_path in candidate_paths:
-        sleep(QUERY_SPACING_IN_SECONDS)
-        yield from process_candidate_url('/'.join([LEHIGH_BASE_URL, candidate_path]))
-
-
-def process_candidate_url(url):
-    response = requests.get(url, verify=False)
-    html_tree = html.fromstring(response.content.decode('utf-8'))
+# don't spam requests; a full crawl is fewer than 50 queries, so the default
+# keeps the original 30 second spacing and --requests-per-second can raise it
+QUERY_SPACING_IN_SECONDS = 30
+REQUESTS_PER_SECOND_PER_HOST = 1 / QUERY_SPACING_IN_SECONDS
+REQUEST_TIMEOUT_IN_SECONDS = 60
+MAX_IN_FLIGHT_REQUESTS = 4
+MAX_REQUEST_ATTEMPTS = 4
+RETRY_BACKOFF_IN_SECONDS = 5
+TOO_MANY_REQUESTS_STATUS_CODE = 429
+RETRIED_STATUS_CODES = (TOO_MANY_REQUESTS_STATUS_CODE, 500, 502, 503, 504)
+
+
+def get_retry_after_in_seconds(response):
+    # `Retry-After` is either a number of seconds or an http date
+    retry_after = response.headers.get('Retry-After')
+    if not retry_after:
+        return None
+    if retry_after.isdigit():
+        return int(retry_after)
+    try:
+        retry_time = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_time - datetime.now(timezone.utc)).total_seconds())
+
+
+class TallyHoCrawler:
+    # fetches pages through one pooled session from an asyncio event loop;
+    # each host gets its own requests per second budget, at most
+    # `max_in_flight_requests` requests are outstanding at once, and failed
+    # requests are retried with exponential backoff, or after the server's
+    # `Retry-After` when it is rate limiting us; the timeout keeps a stalled
+    # connection from holding an in flight slot
+    def __init__(self, requests_per_second_per_host=REQUESTS_PER_SECOND_PER_HOST,
+                 max_in_flight_requests=MAX_IN_FLIGHT_REQUESTS, timeout_in_seconds=REQUEST_TIMEOUT_IN_SECONDS):
+        self._request_interval_in_seconds = 1 / requests_per_second_per_host
+        self._timeout_in_seconds = timeout_in_seconds
+        self._in_flight_requests = asyncio.Semaphore(max_in_flight_requests)
+        self._host_rate_limiters = {}
+        self._session = requests.Session()
+        self._session.verify = False
+        self._session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=max_in_flight_requests))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._session.close()
+
+    async def get_html_tree(self, url):
+        content = await self._get(url)
+        return html.fromstring(content.decode('utf-8'))
+
+    async def _get(self, url):
+        host = urlsplit(url).hostname
+        if host not in self._host_rate_limiters:
+            self._host_rate_limiters[host] = AsyncRateLimiter(self._request_interval_in_seconds)
+        host_rate_limiter = self._host_rate_limiters[host]
+        for attempt in range(MAX_REQUEST_ATTEMPTS):
+            await host_rate_limiter.wait()
+            retry_after_in_seconds = None
+            try:
+                async with self._in_flight_requests:
+                    response = await asyncio.to_thread(self._session.get, url, timeout=self._timeout_in_seconds)
+                if response.status_code not in RETRIED_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.content
+                error = f'status {response.status_code}'
+                if response.status_code == TOO_MANY_REQUESTS_STATUS_CODE:
+                    retry_after_in_seconds = get_retry_after_in_seconds(response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = repr(e)
+            if attempt + 1 == MAX_REQUEST_ATTEMPTS:
+                raise IOError(f'giving up on {url} after {MAX_REQUEST_ATTEMPTS} attempts: {error}')
+            if retry_after_in_seconds is not None:
+                # holds back every request to the host, not just this one
+                print(f'retrying {url} after {retry_after_in_seconds:.0f}s: {error}')
+                host_rate_limiter.defer(retry_after_in_seconds)
+            else:
+                backoff_in_seconds = RETRY_BACKOFF_IN_SECONDS * 2 ** attempt
+                print(f'retrying {url} in {backoff_in_seconds}s: {error}')
+                await asyncio.sleep(backoff_in_seconds)
+
+
+async def get_candidate_paths(crawler, category_id):
+    url = f'{LEHIGH_BASE_URL}/ElectionResultsView.aspx?election={ELECTION_ID}&category={category_id}'
+    html_tree = await crawler.get_html_tree(url)
+    return html_tree.xpath('//div[contains(@class, "col-districts-body")]/a/@href')
+
+
+async def crawl_candidate_path(crawler, candidate_path):
+    # each candidate page is parsed as soon as it arrives
+    html_tree = await crawler.get_html_tree('/'.join([LEHIGH_BASE_URL, candidate_path]))
+    return list(process_candidate_html_tree(html_tree))
+
+
+def process_candidate_html_tree(html_tree):
     candidate = html_tree.xpath('//span[@id="candidateName"]/text()')[0].split('By District for: ')[1]
     office, party, district = extract_office_party_and_district(html_tree)
     if 'Delegate' not in office and 'Committee' not in office:
@@ -76,13 +160,29 @@ def extract_office_party_and_district(html_tree):
     return office, party, district
 
 
+async def crawl_to_csv(csv_writer, crawler):
+    # requests overlap freely, but rows are written in category, then
+    # candidate path order, as each candidate's turn comes up
+    category_tasks = [asyncio.create_task(get_candidate_paths(crawler, category_id))
+                      for category_id in CANDIDATE_CATEGORY_IDS]
+    candidate_tasks = []
+    for category_task in category_tasks:
+        for candidate_path in await category_task:
+            candidate_tasks.append(asyncio.create_task(crawl_candidate_path(crawler, candidate_path)))
+    for candidate_task in candidate_tasks:
+        csv_writer.writerows(await candidate_task)
+
+
 def main():
-    with open(OUTPUT_FILE, 'w', newline='') as f_out:
-        csv_writer = csv.DictWriter(f_out, OUTPUT_HEADER)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests-per-second', type=float, default=REQUESTS_PER_SECOND_PER_HOST)
+    parser.add_argument('--max-in-flight', type=int, default=MAX_IN_FLIGHT_REQUESTS)
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT_IN_SECONDS, help='seconds per request')
+    args, _ = parser.parse_known_args()  # leaves `--output-format` to the output sink
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer, \
+            TallyHoCrawler(args.requests_per_second, args.max_in_flight, args.timeout) as crawler:
         csv_writer.writeheader()
-        urls = get_candidate_urls()
-        for row in process_candidate_paths(urls):
-            csv_writer.writerow(row)
+        asyncio.run(crawl_to_csv(csv_writer, crawler))
 
 
 if __name__ == "__main__":
@@ -1,7 +1,9 @@
-import csv
+import argparse
 import os
 import json
 import requests
+from parsers.clarity_polling import POLLING_INTERVAL_IN_SECONDS, ContestDeltaTracker, hash_vote_data, poll_clarity
+from parsers.output_sinks import open_output_sink
 
 
 COUNTY = 'Luzerne'
@@ -9,9 +11,12 @@ COUNTY = 'Luzerne'
 OUTPUT_FILE = os.path.join('..', '2020', '20200602__pa__primary__luzerne__precinct.csv')
 OUTPUT_HEADER = ['county', 'precinct', 'office', 'district', 'party', 'candidate', 'votes']
 
-LUZERNE_CLARITY_URL = 'https://results.enr.clarityelections.com/PA/Luzerne/103399/254832/json'
+LUZERNE_ELECTION_URL = 'https://results.enr.clarityelections.com/PA/Luzerne/103399'
+LUZERNE_OFFICIAL_VERSION = '254832'
+LUZERNE_CLARITY_URL = f'{LUZERNE_ELECTION_URL}/{LUZERNE_OFFICIAL_VERSION}/json'
 SUMMARY_JSON_URL = f'{LUZERNE_CLARITY_URL}/en/summary.json'
 DETAILS_JSON_URL = f'{LUZERNE_CLARITY_URL}/details.json'
+DELTA_LOG_FILE = 'luzerne_deltas.jsonl'
 
 RACE_TO_OPENELECTIONS_OFFICE_AND_DISTRICT = {
     'President of the United States': ('President', ''),
@@ -30,8 +35,7 @@ RACE_TO_OPENELECTIONS_OFFICE_AND_DISTRICT = {
 def jsons_to_csv():
     summary_json = json.loads(requests.get(SUMMARY_JSON_URL).text)
     details_json = json.loads(requests.get(DETAILS_JSON_URL).text)
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        csv_writer = csv.DictWriter(f, OUTPUT_HEADER)
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
         csv_writer.writeheader()
         for row in iterate_candidate_level_data(details_json, summary_json):
             csv_writer.writerow(row)
@@ -42,10 +46,14 @@ def iterate_candidate_level_data(details_json, summary_json):
     for contest_details in details_json['Contests']:
         contest = contest_key_to_contest[contest_details['K']]
         contest_name = contest['C']
-        if 'Committee' not in contest_name and 'Delegate' not in contest_name:
+        if should_be_recorded(contest_name):
             yield from iterate_contest_level_data(contest, contest_details, contest_name)
 
 
+def should_be_recorded(contest_name):
+    return 'Committee' not in contest_name and 'Delegate' not in contest_name
+
+
 def iterate_contest_level_data(contest, contest_details, contest_name):
     office, party, district = extract_office_party_and_district(contest_name)
     candidates = contest['CH']
@@ -68,5 +76,58 @@ def extract_office_party_and_district(contest_name):
     return office.strip(), party.strip(), district
 
 
+class LuzerneLiveResults:
+    # election night polling: keeps each contest's rows between versions, so a
+    # new version only rebuilds the contests whose candidates, precincts or
+    # vote arrays changed, then rewrites the csv in contest order; contests
+    # are tracked by their Clarity key, since names need not be unique
+    def __init__(self, delta_log_filename=DELTA_LOG_FILE):
+        self._delta_tracker = ContestDeltaTracker(delta_log_filename)
+        self._contest_key_to_rows = {}
+
+    def refresh(self, version):
+        version_url = f'{LUZERNE_ELECTION_URL}/{version}/json'
+        summary_json = json.loads(requests.get(f'{version_url}/en/summary.json').text)
+        details_json = json.loads(requests.get(f'{version_url}/details.json').text)
+        contest_key_to_contest = {contest['K']: contest for contest in summary_json}
+        contests = [(contest_key_to_contest[contest_details['K']], contest_details)
+                    for contest_details in details_json['Contests']]
+        contest_key_to_digest = {
+            contest['K']: hash_vote_data([contest['CH'], contest_details['P'], contest_details['V']])
+            for contest, contest_details in contests
+        }
+        changed_contest_keys = set(self._delta_tracker.get_changed_contests(contest_key_to_digest))
+        contest_key_to_rows = {}
+        for contest, contest_details in contests:
+            contest_key = contest['K']
+            contest_name = contest['C']
+            if not should_be_recorded(contest_name):
+                continue
+            if contest_key in changed_contest_keys:
+                contest_key_to_rows[contest_key] = list(
+                    iterate_contest_level_data(contest, contest_details, contest_name))
+            else:
+                contest_key_to_rows[contest_key] = self._contest_key_to_rows[contest_key]
+        with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
+            csv_writer.writeheader()
+            for rows in contest_key_to_rows.values():
+                csv_writer.writerows(rows)
+        self._contest_key_to_rows = contest_key_to_rows
+        self._delta_tracker.record(version, contest_key_to_digest,
+                                   {contest['K']: contest['C'] for contest, _ in contests})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--poll', action='store_true', help='refresh whenever Clarity publishes a new version')
+    parser.add_argument('--interval', type=float, default=POLLING_INTERVAL_IN_SECONDS)
+    parser.add_argument('--delta-log', default=DELTA_LOG_FILE)
+    args, _ = parser.parse_known_args()  # leaves `--output-format` to the output sink
+    if args.poll:
+        poll_clarity(LUZERNE_ELECTION_URL, LuzerneLiveResults(args.delta_log).refresh, args.interval)
+    else:
+        jsons_to_csv()
+
+
 if __name__ == "__main__":
-    jsons_to_csv()
\ No newline at end of file
+    main()
\ No newline at end of file
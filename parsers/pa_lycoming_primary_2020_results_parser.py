@@ -1,7 +1,7 @@
-import csv
 import os
 from parsers.pa_pdf_parser import PDFPageIterator, PDFStringIterator
 from parsers.constants.pa_candidates_2020 import STATEWIDE_PRIMARY_CANDIDATES
+from parsers.output_sinks import open_output_sink
 
 
 COUNTY = 'Lycoming'
@@ -117,6 +117,6 @@ def pdf_to_csv(pdf, csv_writer):
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
         pdf_to_csv(PDFPageIterator(LYCOMING_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER))
+                   csv_writer)
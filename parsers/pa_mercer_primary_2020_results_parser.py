@@ -1,6 +1,5 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
 from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
     ElectionwarePDFTableParser, ElectionwarePDFPageParser
 
@@ -38,6 +37,8 @@ OPENELECTIONS_MAPPED_HEADER = [
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 06/15/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICES = ('Voter Turnout', 'Wheatland Home Rule')
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'U.S. REP, 16TH DISTRICT': ('U.S. House', 16),
@@ -57,6 +58,7 @@ class MercerPDFTableParser(ElectionwarePDFTableParser):
     _expected_table_headers = EXPECTED_TABLE_HEADERS
     _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
     _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
+    _skipped_offices = SKIPPED_OFFICES
 
     @classmethod
     def _clean_row(cls, row):
@@ -64,14 +66,6 @@ class MercerPDFTableParser(ElectionwarePDFTableParser):
         row['office'] = row['office'].title()
         row['candidate'] = row['candidate'].replace('Write-In: ', '').title()
 
-    @classmethod
-    def _should_be_recorded(cls, row):
-        if not super()._should_be_recorded(row):
-            return False
-        if row['office'] == 'Wheatland Home Rule':
-            return False
-        return True
-
 
 class MercerPDFPageParser(ElectionwarePDFPageParser):
     _pdf_string_iterator_clazz = MercerPDFStringIterator
@@ -79,8 +73,13 @@ class MercerPDFPageParser(ElectionwarePDFPageParser):
     _header = MERCER_HEADER
 
 
-if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
         pdf_to_csv(PDFPageIterator(MERCER_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   MercerPDFPageParser)
+                   csv_writer,
+                   MercerPDFPageParser,
+                   checkpoint=checkpoint)
+
+
+if __name__ == "__main__":
+    convert()
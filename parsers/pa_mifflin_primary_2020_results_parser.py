@@ -1,8 +1,7 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
-from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
-    ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
+from parsers.electionware_parser import pdf_to_csv, ElectionwareCountyProfile, \
+    compile_county_profile
 
 COUNTY = 'Mifflin'
 
@@ -51,6 +50,11 @@ OPENELECTIONS_MAPPED_HEADER = [
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 06/19/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICE_SUBSTRINGS = ('Delegate', 'Comm')
+
+# there's already a Write-In Totals field; this prevents double counting
+SKIPPED_CANDIDATE_PREFIXES = ('Write-In: ',)
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'REPRESENTATIVE IN THE GENERAL ASSEMBLY 81ST DISTRICT': ('General Assembly', 81),
@@ -60,42 +64,29 @@ RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
 }
 
 
-class MifflinPDFStringIterator(ElectionwarePDFStringIterator):
-    _first_footer_substring = FIRST_FOOTER_SUBSTRING
-    _second_footer_substring = SECOND_FOOTER_SUBSTRING
-
+MIFFLIN_PROFILE = ElectionwareCountyProfile(
+    county=COUNTY,
+    header=MIFFLIN_HEADER,
+    footer_substrings=(FIRST_FOOTER_SUBSTRING, SECOND_FOOTER_SUBSTRING),
+    expected_table_headers=EXPECTED_TABLE_HEADERS,
+    openelections_mapped_header=OPENELECTIONS_MAPPED_HEADER,
+    raw_office_to_office_and_district=RAW_OFFICE_TO_OFFICE_AND_DISTRICT,
+    title_case_offices=True,
+    title_case_candidates=True,
+    skipped_office_substrings=SKIPPED_OFFICE_SUBSTRINGS,
+    skipped_candidate_prefixes=SKIPPED_CANDIDATE_PREFIXES,
+)
 
-class MifflinPDFTableParser(ElectionwarePDFTableParser):
-    _county = COUNTY
-    _expected_table_headers = EXPECTED_TABLE_HEADERS
-    _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
-    _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
+MifflinPDFPageParser = compile_county_profile(MIFFLIN_PROFILE, __name__)
 
-    @classmethod
-    def _clean_row(cls, row):
-        super()._clean_row(row)
-        row['office'] = row['office'].title()
-        row['candidate'] = row['candidate'].title()
 
-    @classmethod
-    def _should_be_recorded(cls, row):
-        if row['candidate'].startswith('Write-In: '):
-            # there's already a Write-In Totals field; this prevents double counting
-            return False
-        if 'Delegate' in row['office']:
-            return False
-        if 'Comm' in row['office']:
-            return False
-        return super()._should_be_recorded(row)
-
-class MifflinPDFPageParser(ElectionwarePDFPageParser):
-    _pdf_string_iterator_clazz = MifflinPDFStringIterator
-    _pdf_table_parser_clazz = MifflinPDFTableParser
-    _header = MIFFLIN_HEADER
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(MIFFLIN_FILE),
+                   csv_writer,
+                   MifflinPDFPageParser,
+                   checkpoint=checkpoint)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(MIFFLIN_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   MifflinPDFPageParser)
+    convert()
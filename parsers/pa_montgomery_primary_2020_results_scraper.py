@@ -1,8 +1,11 @@
-import csv
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
 import requests
 from time import sleep
+from parsers.output_sinks import open_output_sink
+from parsers.rate_limiter import RateLimiter
 
 
 COUNTY = 'Montgomery'
@@ -29,10 +32,31 @@ MONTGOMERY_PRIMARY_2020_RESULTS_URL = ARCGIS_SERVICES_PATH + MONTGOMERY_PRIMARY_
 QUERY_FIELDS = ['Contest', 'Party', 'Candidate', 'Precinct_Name', 'NumVotes']
 QUERY_RECORD_BLOCK_SIZE = 1000
 QUERY_SPACING_IN_SECONDS = 30  # don't spam requests; total process should be <50 queries
+QUERY_WORKERS = 4
+ALL_FEATURES_WHERE_CLAUSE = '(1=1)'
+NO_DELEGATES_WHERE_CLAUSE = "(Contest NOT LIKE '%Delegate%')"
 
 
 class ArcgisIterator:
+    # by default pages through the features one block after another; in
+    # parallel mode the feature count is queried first and the offset blocks
+    # are fetched concurrently, with every request sharing one rate limit,
+    # then reassembled in offset order
+    def __init__(self, url=MONTGOMERY_PRIMARY_2020_RESULTS_URL, where=ALL_FEATURES_WHERE_CLAUSE,
+                 parallel=False, workers=QUERY_WORKERS, query_spacing_in_seconds=QUERY_SPACING_IN_SECONDS):
+        self._url = url
+        self._where = where
+        self._parallel = parallel
+        self._workers = workers
+        self._query_spacing_in_seconds = query_spacing_in_seconds
+
     def __iter__(self):
+        if self._parallel:
+            yield from self._iterate_parallel()
+        else:
+            yield from self._iterate_serial()
+
+    def _iterate_serial(self):
         result_offset = 0
         done = False
         while not done:
@@ -43,21 +67,46 @@ class ArcgisIterator:
             done = len(features) < QUERY_RECORD_BLOCK_SIZE
             if not done:
                 result_offset += QUERY_RECORD_BLOCK_SIZE
-                sleep(QUERY_SPACING_IN_SECONDS)
+                sleep(self._query_spacing_in_seconds)
+
+    def _iterate_parallel(self):
+        rate_limiter = RateLimiter(self._query_spacing_in_seconds)
+        rate_limiter.wait()
+        feature_count = self._get_feature_count()
+        result_offsets = range(0, feature_count, QUERY_RECORD_BLOCK_SIZE)
+
+        def get_feature_block(result_offset):
+            rate_limiter.wait()
+            print(f'processing feature {result_offset + 1} - {result_offset + QUERY_RECORD_BLOCK_SIZE}')
+            features = self._get_next_feature_block(result_offset)
+            expected_feature_count = min(QUERY_RECORD_BLOCK_SIZE, feature_count - result_offset)
+            assert len(features) == expected_feature_count, \
+                f'expected {expected_feature_count} features at offset {result_offset}, got {len(features)}'
+            return features
+
+        with ThreadPoolExecutor(self._workers) as executor:
+            # `map` returns the blocks in offset order, whatever order they arrive in
+            for features in executor.map(get_feature_block, result_offsets):
+                yield from features
+
+    def _get_feature_count(self):
+        return self._query({'f': 'json', 'where': self._where, 'returnCountOnly': 'true'})['count']
 
     def _get_next_feature_block(self, result_offset):
         params = {
             'f': 'json',
-            'where': '(1=1)',
+            'where': self._where,
             'outFields': ','.join(QUERY_FIELDS),
             'orderByFields': ','.join(QUERY_FIELDS) + " DESC",
             'resultOffset': result_offset,
             'resultRecordCount': QUERY_RECORD_BLOCK_SIZE,
             'quantizationParameters': '{"mode":"edit"}',
         }
-        response = requests.get(MONTGOMERY_PRIMARY_2020_RESULTS_URL, params)
-        json_data = json.loads(response.text)
-        return json_data['features']
+        return self._query(params)['features']
+
+    def _query(self, params):
+        response = requests.get(self._url, params)
+        return json.loads(response.text)
 
 
 def extract_party_from_office(office, party):
@@ -99,10 +148,19 @@ def process_features(arcgis_iterator):
 
 
 def main():
-    with open(OUTPUT_FILE, 'w', newline='') as f_out:
-        csv_writer = csv.DictWriter(f_out, OUTPUT_HEADER)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default=MONTGOMERY_PRIMARY_2020_RESULTS_URL)
+    parser.add_argument('--parallel', action='store_true')
+    parser.add_argument('--workers', type=int, default=QUERY_WORKERS)
+    parser.add_argument('--query-spacing', type=float, default=QUERY_SPACING_IN_SECONDS)
+    parser.add_argument('--filter-delegates-on-server', action='store_true',
+                        help='exclude delegate contests in the query instead of after transferring them')
+    args, _ = parser.parse_known_args()  # leaves `--output-format` to the output sink
+    where = NO_DELEGATES_WHERE_CLAUSE if args.filter_delegates_on_server else ALL_FEATURES_WHERE_CLAUSE
+    arcgis_iterator = ArcgisIterator(args.url, where, args.parallel, args.workers, args.query_spacing)
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
         csv_writer.writeheader()
-        for row in process_features(ArcgisIterator()):
+        for row in process_features(arcgis_iterator):
             csv_writer.writerow(row)
 
 
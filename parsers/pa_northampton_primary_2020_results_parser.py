@@ -1,8 +1,7 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
-from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
-    ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
+from parsers.electionware_parser import pdf_to_csv, ElectionwareCountyProfile, \
+    compile_county_profile
 
 COUNTY = 'Northampton'
 
@@ -48,6 +47,9 @@ OPENELECTIONS_MAPPED_HEADER = [
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 06/22/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICES = ('Voter Turnout', 'Library Tax Question')
+SKIPPED_OFFICE_SUBSTRINGS = ('Delegate', 'County Committee')
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'President of the United States': ('President', ''),
     'Representative in Congress': ('U.S. House', 7),
@@ -60,36 +62,27 @@ RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
 }
 
 
-class NorthamptonPDFStringIterator(ElectionwarePDFStringIterator):
-    _first_footer_substring = FIRST_FOOTER_SUBSTRING
-    _second_footer_substring = SECOND_FOOTER_SUBSTRING
-
-
-class NorthamptonPDFTableParser(ElectionwarePDFTableParser):
-    _county = COUNTY
-    _expected_table_headers = EXPECTED_TABLE_HEADERS
-    _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
-    _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
+NORTHAMPTON_PROFILE = ElectionwareCountyProfile(
+    county=COUNTY,
+    header=NORTHAMPTON_HEADER,
+    footer_substrings=(FIRST_FOOTER_SUBSTRING, SECOND_FOOTER_SUBSTRING),
+    expected_table_headers=EXPECTED_TABLE_HEADERS,
+    openelections_mapped_header=OPENELECTIONS_MAPPED_HEADER,
+    raw_office_to_office_and_district=RAW_OFFICE_TO_OFFICE_AND_DISTRICT,
+    skipped_offices=SKIPPED_OFFICES,
+    skipped_office_substrings=SKIPPED_OFFICE_SUBSTRINGS,
+)
 
-    @classmethod
-    def _should_be_recorded(cls, row):
-        if not super()._should_be_recorded(row):
-            return False
-        if 'County Committee' in row['office']:
-            return False
-        if row['office'] == 'Library Tax Question':
-            return False
-        return True
+NorthamptonPDFPageParser = compile_county_profile(NORTHAMPTON_PROFILE, __name__)
 
 
-class NorthamptonPDFPageParser(ElectionwarePDFPageParser):
-    _pdf_string_iterator_clazz = NorthamptonPDFStringIterator
-    _pdf_table_parser_clazz = NorthamptonPDFTableParser
-    _header = NORTHAMPTON_HEADER
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(NORTHAMPTON_FILE),
+                   csv_writer,
+                   NorthamptonPDFPageParser,
+                   checkpoint=checkpoint)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(NORTHAMPTON_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   NorthamptonPDFPageParser)
+    convert()
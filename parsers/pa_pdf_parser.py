@@ -1,9 +1,127 @@
-from collections import namedtuple
-from pdfreader import PageDoesNotExist, SimplePDFViewer
+from array import array
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+import cProfile
+import csv
+import json
+import os
+import pickle
+import pstats
+import resource
+import sys
+from queue import Full, Queue
+from threading import Event, Thread
+from time import perf_counter
+from pdfreader import PageDoesNotExist
+from parsers.output_sinks import OutputSink, open_output_sink
+from parsers.pdf_backends import DEFAULT_PDF_BACKEND, open_pdf_backend
+from parsers.pdf_string_cache import PDF_STRING_CACHE, hash_pdf_file
 
 
 CandidateData = namedtuple('CandidateData', 'office district party candidate')
 
+RESULT_ROW_FIELDS = ('county', 'precinct', 'office', 'district', 'party', 'candidate',
+                     'election_day', 'absentee', 'mail_in', 'provisional', 'votes', 'military')
+
+RENDER_WORKERS = os.cpu_count() or 1
+PAGES_PER_RENDER_TASK = 8
+PIPELINE_QUEUE_DEPTH = 8
+QUEUE_POLL_IN_SECONDS = 0.1
+CHECKPOINT_INTERVAL_IN_PAGES = 10
+CHECKPOINT_SUFFIX = '.checkpoint'
+RESUME_FLAG = '--resume'
+METRICS_REPORT_ENVIRONMENT_VARIABLE = 'PDF_METRICS_REPORT'
+METRICS_PROFILE_ENVIRONMENT_VARIABLE = 'PDF_METRICS_PROFILE'
+METRICS_FIELDS = ['page_number', 'string_count', 'render_seconds', 'parse_seconds', 'row_count']
+SLOWEST_PAGES_REPORTED = 5
+PROFILE_FUNCTIONS_REPORTED = 25
+PIPELINE_STAGES = ('render', 'parse', 'write')
+STREAMING_ENVIRONMENT_VARIABLE = 'PDF_STREAMING'
+STREAMING_PAGES_PER_BACKEND = 50
+
+
+class ResultRow:
+    # slotted output row; vote columns hold ints and columns that were never
+    # set are None, which the output sinks write as empty fields. Item access
+    # is kept so parsers can still treat a row like the dict it replaces
+    __slots__ = RESULT_ROW_FIELDS
+    _fields = RESULT_ROW_FIELDS
+
+    def __init__(self, county=None, precinct=None, office=None, district=None, party=None, candidate=None,
+                 election_day=None, absentee=None, mail_in=None, provisional=None, votes=None, military=None):
+        self.county = county
+        self.precinct = precinct
+        self.office = office
+        self.district = district
+        self.party = party
+        self.candidate = candidate
+        self.election_day = election_day
+        self.absentee = absentee
+        self.mail_in = mail_in
+        self.provisional = provisional
+        self.votes = votes
+        self.military = military
+
+    def __getitem__(self, field):
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        setattr(self, field, value)
+
+    def __delitem__(self, field):
+        setattr(self, field, None)
+
+    def __contains__(self, field):
+        # like a dict, a field only counts as present once it was set
+        return getattr(self, field, None) is not None
+
+    def __iter__(self):
+        return iter(self._asdict())
+
+    def get(self, field, default=None):
+        value = getattr(self, field, None)
+        return default if value is None else value
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return self._asdict() == other
+        if isinstance(other, ResultRow):
+            return all(getattr(self, field) == getattr(other, field) for field in self._fields)
+        return NotImplemented
+
+    def __repr__(self):
+        return f'ResultRow({self._asdict()!r})'
+
+    def update(self, **fields):
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+    def _asdict(self):
+        # only the columns that were set, like the dict rows this replaces
+        return {field: getattr(self, field) for field in self._fields if getattr(self, field) is not None}
+
+
+class DictRowWriter:
+    # hands rows to a plain csv.DictWriter as dicts; output sinks take row
+    # objects directly
+    def __init__(self, csv_writer):
+        self._csv_writer = csv_writer
+
+    def writeheader(self):
+        self._csv_writer.writeheader()
+
+    def writerow(self, row):
+        self._csv_writer.writerow(row if isinstance(row, dict) else row._asdict())
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+def get_row_writer(csv_writer):
+    return csv_writer if isinstance(csv_writer, OutputSink) else DictRowWriter(csv_writer)
+
 
 class PDFStringIterator:
     def __init__(self, strings):
@@ -28,39 +146,226 @@ class PDFStringIterator:
         return self._strings_offset < len(self._strings)
 
 
+def get_pdf_cache_key(filename, backend):
+    pdf_hash = hash_pdf_file(filename)
+    if backend == DEFAULT_PDF_BACKEND:
+        return pdf_hash
+    return f'{pdf_hash}.{backend}'
+
+
+def get_peak_rss_in_megabytes():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is in kilobytes on linux
+
+
 class PDFPageIterator:
-    def __init__(self, filename):
-        self._pdf_viewer = None
+    # in streaming mode each page's rendered objects are released as soon as
+    # the next page is requested, and the backend is reopened every
+    # `STREAMING_PAGES_PER_BACKEND` pages so the document-wide object caches
+    # stay bounded; the peak rss of the run is reported when the pdf is closed
+    def __init__(self, filename, cache=PDF_STRING_CACHE, first_page_number=1, last_page_number=None,
+                 backend=DEFAULT_PDF_BACKEND, streaming=None, pdf_hash=None):
+        self._f = None
+        self._filename = filename
+        self._backend = backend
+        self._pdf_backend = None
         self._page_number = 0
+        self._next_page_number = first_page_number
+        self._last_page_number = last_page_number
         self._rendered = False
+        self._strings = None
+        self._render_seconds = 0
+        self._cache = None
+        self._pdf_hash = None
+        if streaming is None:
+            streaming = bool(os.environ.get(STREAMING_ENVIRONMENT_VARIABLE))
+        self._streaming = streaming
+        self._pages_since_backend_opened = 0
         if filename:
-            self._pdf_viewer = SimplePDFViewer(open(filename, 'rb'))
+            self._f = open(filename, 'rb')
+            self._pdf_backend = open_pdf_backend(self._f, backend)
+            if cache:
+                # callers opening the same pdf many times, e.g. once per shard,
+                # pass the cache key in instead of hashing the file each time
+                self._cache = cache
+                self._pdf_hash = pdf_hash or get_pdf_cache_key(filename, backend)
 
     def __iter__(self):
         return self
 
     def __next__(self):
+        if self._last_page_number is not None and self._next_page_number > self._last_page_number:
+            self.close()
+            raise StopIteration
         try:
-            self._go_to_next_pdf_page()
+            self._go_to_pdf_page(self._next_page_number)
             return self
         except PageDoesNotExist as e:
+            self.close()
             raise StopIteration(e)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._f and not self._f.closed:
+            self._f.close()
+            if self._streaming:
+                print(f'peak rss {get_peak_rss_in_megabytes():.1f} MB after page {self._page_number}')
+        self._strings = None
+
+    def seek(self, page_number):
+        # the next call to `next()` returns this page
+        self._next_page_number = page_number
+
+    def get_filename(self):
+        return self._filename
+
     def get_page_number(self):
         return self._page_number
 
     def get_strings(self):
         if not self._rendered:
-            self._pdf_viewer.render()
+            start_time = perf_counter()
+            self._strings = self._render_strings()
+            self._render_seconds += perf_counter() - start_time
             self._rendered = True
-        return self._pdf_viewer.canvas.strings
-
-    def _go_to_next_pdf_page(self):
-        if self._page_number != 0:
-            self._pdf_viewer.next()
-        self._page_number += 1
+        return self._strings
+
+    def get_render_seconds(self):
+        # navigating to the page plus rendering its strings, once they were requested
+        return self._render_seconds
+
+    def _render_strings(self):
+        if self._cache:
+            strings = self._cache.get(self._pdf_hash, self._page_number)
+            if strings is not None:
+                return strings
+        strings = self._pdf_backend.render()
+        if self._streaming:
+            strings = list(strings)  # detach the strings from the backend's page objects
+        if self._cache:
+            self._cache.put(self._pdf_hash, self._page_number, strings)
+        return strings
+
+    def _go_to_pdf_page(self, page_number):
+        if self._streaming:
+            self._release_page()
+        start_time = perf_counter()
+        if page_number != self._page_number + 1:
+            self._pdf_backend.navigate(page_number)
+        elif self._page_number != 0:
+            self._pdf_backend.next()
+        self._render_seconds = perf_counter() - start_time
+        self._page_number = page_number
+        self._next_page_number = page_number + 1
         self._rendered = False
 
+    def _release_page(self):
+        self._strings = None
+        if not self._page_number:
+            return
+        self._pdf_backend.release_page()
+        self._pages_since_backend_opened += 1
+        if self._pages_since_backend_opened >= STREAMING_PAGES_PER_BACKEND:
+            self._pages_since_backend_opened = 0
+            self._f.seek(0)
+            self._pdf_backend = open_pdf_backend(self._f, self._backend)
+            self._page_number = 0  # forces the next page to be navigated to
+
+
+class RenderedPDFPage:
+    def __init__(self, page_number, strings, render_seconds=0):
+        self._page_number = page_number
+        self._strings = strings
+        self._render_seconds = render_seconds
+
+    def get_page_number(self):
+        return self._page_number
+
+    def get_strings(self):
+        return self._strings
+
+    def get_render_seconds(self):
+        # spent wherever the page was rendered, e.g. in a worker process
+        return self._render_seconds
+
+
+def render_pdf_pages(filename, first_page_number, page_count, cache=None, pdf_hash=None,
+                     backend=DEFAULT_PDF_BACKEND):
+    # returns the strings and render seconds of each page
+    pages = []
+    with open(filename, 'rb') as f:
+        pdf_backend = open_pdf_backend(f, backend)
+        try:
+            for page_number in range(first_page_number, first_page_number + page_count):
+                start_time = perf_counter()
+                if page_number == first_page_number:
+                    pdf_backend.navigate(page_number)
+                else:
+                    pdf_backend.next()
+                strings = cache.get(pdf_hash, page_number) if cache else None
+                if strings is None:
+                    strings = pdf_backend.render()
+                    if cache:
+                        cache.put(pdf_hash, page_number, strings)
+                pages.append((strings, perf_counter() - start_time))
+        except PageDoesNotExist:
+            pass
+    return pages
+
+
+class ParallelPDFPageIterator:
+    # renders pages in a process pool and hands them back in page order, so
+    # pdf_to_csv can still carry table headers and parties from page to page
+    def __init__(self, filename, workers=RENDER_WORKERS, pages_per_task=PAGES_PER_RENDER_TASK,
+                 cache=PDF_STRING_CACHE, first_page_number=1, last_page_number=None,
+                 backend=DEFAULT_PDF_BACKEND):
+        self._filename = filename
+        self._backend = backend
+        self._workers = workers
+        self._pages_per_task = pages_per_task
+        self._first_page_number = first_page_number
+        self._last_page_number = last_page_number
+        self._cache = cache
+        self._pdf_hash = get_pdf_cache_key(filename, backend) if cache else None
+
+    def __iter__(self):
+        with ProcessPoolExecutor(self._workers) as executor:
+            pending_tasks = deque()
+            next_page_number = self._first_page_number
+            while True:
+                while len(pending_tasks) < 2 * self._workers and self._page_is_in_range(next_page_number):
+                    page_count = self._pages_per_task
+                    if self._last_page_number is not None:
+                        page_count = min(page_count, self._last_page_number - next_page_number + 1)
+                    future = executor.submit(render_pdf_pages, self._filename, next_page_number,
+                                             page_count, self._cache, self._pdf_hash, self._backend)
+                    pending_tasks.append((next_page_number, page_count, future))
+                    next_page_number += page_count
+                if not pending_tasks:
+                    return
+                first_page_number, page_count, future = pending_tasks.popleft()
+                pages = future.result()
+                for offset, (strings, render_seconds) in enumerate(pages):
+                    yield RenderedPDFPage(first_page_number + offset, strings, render_seconds)
+                if len(pages) < page_count:
+                    for _, _, future in pending_tasks:
+                        future.cancel()
+                    return
+
+    def seek(self, page_number):
+        # only valid before iteration starts
+        self._first_page_number = page_number
+
+    def get_filename(self):
+        return self._filename
+
+    def _page_is_in_range(self, page_number):
+        return self._last_page_number is None or page_number <= self._last_page_number
+
 
 class TableHeader:
     _congressional_keywords = None
@@ -104,6 +409,37 @@ class TableHeader:
         return party, office.strip(), district
 
 
+class SubheaderTrie:
+    # character-level trie over the valid subheaders, so a subheader wrapped
+    # across several strings is matched one string at a time
+    _MATCH_KEY = None
+
+    def __init__(self, valid_subheaders):
+        self._root = {}
+        for subheader in valid_subheaders:
+            node = self._root
+            for c in subheader:
+                node = node.setdefault(c, {})
+            node[self._MATCH_KEY] = subheader
+
+    def root(self):
+        return self._root
+
+    @staticmethod
+    def advance(node, s, is_continuation):
+        if is_continuation:
+            node = node.get(' ')
+        for c in s:
+            if node is None:
+                break
+            node = node.get(c)
+        return node
+
+    @classmethod
+    def match(cls, node):
+        return node.get(cls._MATCH_KEY)
+
+
 class TableHeaderParser:
     _first_subheader_string = None
     _terminal_header_string = None
@@ -122,8 +458,15 @@ class TableHeaderParser:
         self._in_subheader_block = False
         self._active_header = []
         self._active_subheader = []
+        self._active_subheader_node = None
         self._active_subheaders = []
 
+    @classmethod
+    def _get_valid_subheader_trie(cls):
+        if '_valid_subheader_trie' not in cls.__dict__:
+            cls._valid_subheader_trie = SubheaderTrie(cls._valid_subheaders)
+        return cls._valid_subheader_trie
+
     def get_header(self):
         if not self._table_header:
             if self._continued_table_header:
@@ -176,8 +519,16 @@ class TableHeaderParser:
             self._process_end_subheader_state(s)
 
     def _process_active_subheader(self):
-        active_subheader_string = ' '.join(self._active_subheader)
-        if active_subheader_string in self._valid_subheaders:
+        valid_subheader_trie = self._get_valid_subheader_trie()
+        is_continuation = len(self._active_subheader) > 1
+        if not is_continuation:
+            self._active_subheader_node = valid_subheader_trie.root()
+        self._active_subheader_node = valid_subheader_trie.advance(
+            self._active_subheader_node, self._active_subheader[-1], is_continuation)
+        assert self._active_subheader_node is not None, \
+            f'unrecognized subheader: {" ".join(self._active_subheader)!r}'
+        active_subheader_string = valid_subheader_trie.match(self._active_subheader_node)
+        if active_subheader_string is not None:
             self._active_subheaders.append(active_subheader_string)
             self._active_subheader = []
 
@@ -198,6 +549,22 @@ class TableHeaderParser:
         self._active_subheaders = []
 
 
+class JurisdictionVotes:
+    # preallocated integer votes for one jurisdiction, with one slot per
+    # distinct table header column for each pass over the table body (e.g. one
+    # pass per vote category); every slot is overwritten on every pass, so the
+    # same instance is reused for each jurisdiction of a table
+    def __init__(self, slot_count, pass_count=1):
+        self._slot_count = slot_count
+        self._votes = array('q', bytes(8 * slot_count * pass_count))
+
+    def set(self, pass_index, slot, vote_count):
+        self._votes[pass_index * self._slot_count + slot] = vote_count
+
+    def get(self, slot):
+        return self._votes[slot::self._slot_count].tolist()
+
+
 class TableBodyParser:
     TURNOUT_OFFICE = 'Turnout'
     SKIPPED_TURNOUT_SUBHEADERS = ('% Turnout', 'Blank')
@@ -208,6 +575,8 @@ class TableBodyParser:
         self._is_office_section_active = True
         self._table_headers = table_headers
         self._jurisdiction = None
+        self._column_slots = None
+        self._slot_candidate_data = None
 
     def __iter__(self):
         while self._string_iterator.has_next():
@@ -233,18 +602,40 @@ class TableBodyParser:
             return candidate_data.candidate in TableBodyParser.SKIPPED_TURNOUT_SUBHEADERS
         return candidate_data.candidate in TableBodyParser.SKIPPED_CANDIDATE_SUBHEADERS
 
-    def _populate_jurisdiction_data(self, candidate_data_to_votes, candidate_data):
-        if self._skipped_subheader(candidate_data):
-            next(self._string_iterator)  # metadata field
-        else:
-            vote_count = next(self._string_iterator)
-            vote_count = int(vote_count if vote_count != '-' else 0)
-            if not self._is_turnout_header(candidate_data):
-                next(self._string_iterator)  # vote percent
-            else:
+    def _map_column_slots(self):
+        # maps each table header column to the slot its votes are stored in,
+        # or None for skipped columns
+        self._column_slots = []
+        self._slot_candidate_data = []
+        for candidate_data in self._table_headers:
+            if self._skipped_subheader(candidate_data):
+                self._column_slots.append(None)
+                continue
+            if self._is_turnout_header(candidate_data):
                 # Registered Voters and Ballot Cast are treated as `office` instead of `candidate`
                 candidate_data = CandidateData(candidate_data.candidate, '', '', '')
-            candidate_data_to_votes[candidate_data].append(vote_count)
+            assert candidate_data not in self._slot_candidate_data, f'duplicate column: {candidate_data}'
+            self._column_slots.append(len(self._slot_candidate_data))
+            self._slot_candidate_data.append(candidate_data)
+
+    def _new_jurisdiction_votes(self, pass_count=1):
+        if self._column_slots is None:
+            self._map_column_slots()
+        return JurisdictionVotes(len(self._slot_candidate_data), pass_count)
+
+    def _populate_jurisdiction_votes(self, jurisdiction_votes, pass_index=0):
+        for slot, candidate_data in zip(self._column_slots, self._table_headers):
+            if slot is None:
+                next(self._string_iterator)  # metadata field
+            else:
+                vote_count = next(self._string_iterator)
+                jurisdiction_votes.set(pass_index, slot, int(vote_count if vote_count != '-' else 0))
+                if not self._is_turnout_header(candidate_data):
+                    next(self._string_iterator)  # vote percent
+
+    def _iterate_jurisdiction_votes(self, jurisdiction_votes):
+        for slot, candidate_data in enumerate(self._slot_candidate_data):
+            yield candidate_data, jurisdiction_votes.get(slot)
 
 
 class PDFPageParser:
@@ -279,14 +670,330 @@ class PDFPageParser:
         assert(page_number_string.split('/')[0].split()[-1] == str(page_number))
 
 
-def pdf_to_csv(pdf, csv_writer, pdf_page_parser_clazz):
-    csv_writer.writeheader()
-    previous_table_header = None
-    previous_party = ''
-    for page in pdf:
+class PipelineStats:
+    # `busy` is time a stage spent on its own work, `starved` time it spent
+    # waiting on its input queue and `blocked` time it spent waiting on a
+    # full output queue; render has no input queue and write no output queue.
+    # The bottleneck is the busiest stage, which the other stages confirm by
+    # starving or blocking on it
+    def __init__(self):
+        self.busy = dict.fromkeys(PIPELINE_STAGES, 0.0)
+        self.starved = dict.fromkeys(PIPELINE_STAGES, 0.0)
+        self.blocked = dict.fromkeys(PIPELINE_STAGES, 0.0)
+
+    def bottleneck(self):
+        return max(PIPELINE_STAGES, key=lambda stage: self.busy[stage])
+
+    def __str__(self):
+        stage_summaries = [f'{stage}: busy {self.busy[stage]:.2f}s, starved {self.starved[stage]:.2f}s, '
+                           f'blocked {self.blocked[stage]:.2f}s'
+                           for stage in PIPELINE_STAGES]
+        return '; '.join(stage_summaries) + f' (bottleneck: {self.bottleneck()})'
+
+
+class _StageFailure:
+    def __init__(self, exception):
+        self.exception = exception
+
+
+_END_OF_STREAM = object()
+
+
+class PDFPipeline:
+    # renders, parses and writes pages on separate threads joined by bounded
+    # queues, so at most `queue_depth` pages and page row batches are held in
+    # memory at once; pages are parsed and written strictly in order
+    def __init__(self, pdf, parse_page, write_rows, queue_depth=PIPELINE_QUEUE_DEPTH):
+        self._pdf = pdf
+        self._parse_page = parse_page
+        self._write_rows = write_rows
+        self._page_queue = Queue(queue_depth)
+        self._row_queue = Queue(queue_depth)
+        self._stopped = Event()
+        self._write_failure = None
+        self.stats = PipelineStats()
+
+    def run(self):
+        render_thread = Thread(target=self._render, daemon=True)
+        write_thread = Thread(target=self._write, daemon=True)
+        render_thread.start()
+        write_thread.start()
+        try:
+            self._parse()
+        finally:
+            self._stopped.set()
+            self._row_queue.put(_END_OF_STREAM)
+            write_thread.join()
+            render_thread.join()
+        if self._write_failure:
+            raise self._write_failure
+        return self.stats
+
+    def _render(self):
+        try:
+            start_time = perf_counter()
+            for page in self._pdf:
+                strings = page.get_strings()
+                rendered_page = RenderedPDFPage(page.get_page_number(), strings, page.get_render_seconds())
+                self.stats.busy['render'] += perf_counter() - start_time
+                if not self._put(self._page_queue, rendered_page, 'render'):
+                    return
+                start_time = perf_counter()
+            self._put(self._page_queue, _END_OF_STREAM, 'render')
+        except Exception as e:
+            self._put(self._page_queue, _StageFailure(e), 'render')
+
+    def _parse(self):
+        while True:
+            page = self._get(self._page_queue, 'parse')
+            if page is _END_OF_STREAM:
+                return
+            if isinstance(page, _StageFailure):
+                raise page.exception
+            start_time = perf_counter()
+            rows = list(self._parse_page(page))
+            self.stats.busy['parse'] += perf_counter() - start_time
+            if not self._put(self._row_queue, rows, 'parse'):
+                return
+
+    def _write(self):
+        while True:
+            rows = self._get(self._row_queue, 'write')
+            if rows is _END_OF_STREAM:
+                return
+            if self._write_failure:
+                continue  # keep draining so the parse stage is never blocked
+            start_time = perf_counter()
+            try:
+                self._write_rows(rows)
+            except Exception as e:
+                self._write_failure = e
+                self._stopped.set()
+            finally:
+                self.stats.busy['write'] += perf_counter() - start_time
+
+    def _get(self, queue, stage):
+        start_time = perf_counter()
+        item = queue.get()
+        self.stats.starved[stage] += perf_counter() - start_time
+        return item
+
+    def _put(self, queue, item, stage):
+        start_time = perf_counter()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    queue.put(item, timeout=QUEUE_POLL_IN_SECONDS)
+                    return True
+                except Full:
+                    pass
+            return False
+        finally:
+            self.stats.blocked[stage] += perf_counter() - start_time
+
+
+def save_continuation_state(filename, continuation_state):
+    with open(filename, 'wb') as f:
+        pickle.dump(continuation_state, f)
+
+
+def load_continuation_state(filename):
+    with open(filename, 'rb') as f:
+        return pickle.load(f)
+
+
+def get_pdf_fingerprint(filename):
+    return {'size': os.path.getsize(filename), 'hash': hash_pdf_file(filename)}
+
+
+class PDFCheckpoint:
+    # records the last completed page, the size of the csv output at that
+    # point and the continuation state needed to parse the following page;
+    # it is saved every `interval` pages and whenever the conversion fails,
+    # along with the size and hash of the pdf so it is never resumed against
+    # a different one
+    def __init__(self, output_file, resume=False, interval=CHECKPOINT_INTERVAL_IN_PAGES):
+        self._output_file = output_file
+        self._filename = output_file.name + CHECKPOINT_SUFFIX
+        self._resume = resume
+        self._interval = interval
+        self._pages_since_save = 0
+        self._last_completed_page = None
+        self._pdf_fingerprint = None
+
+    @classmethod
+    def for_output(cls, output_file, resume=False):
+        # compressed and columnar output sinks cannot be truncated, so they run
+        # without checkpoints
+        if not getattr(output_file, 'supports_checkpoints', True):
+            assert not resume, 'only plain csv output can be resumed'
+            return None
+        return cls(output_file, resume)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type:
+            self.save()
+        else:
+            self._remove()
+
+    def restore(self, pdf):
+        # returns the saved continuation state after truncating the csv output
+        # to the last completed page and seeking `pdf` past it, or None when
+        # there is nothing to resume; a fresh run discards any stale checkpoint
+        self._pdf_fingerprint = get_pdf_fingerprint(pdf.get_filename())
+        checkpoint_data = None
+        if not self._resume:
+            self._remove()
+        elif os.path.exists(self._filename):
+            checkpoint_data = load_continuation_state(self._filename)
+            assert checkpoint_data.get('pdf') == self._pdf_fingerprint, \
+                f'{self._filename} was saved for a different pdf; rerun without {RESUME_FLAG}'
+        self._output_file.flush()
+        self._output_file.truncate(checkpoint_data['offset'] if checkpoint_data else 0)
+        if not checkpoint_data:
+            return None
+        print(f'resuming after page {checkpoint_data["page_number"]}')
+        self._last_completed_page = checkpoint_data
+        pdf.seek(checkpoint_data['page_number'] + 1)
+        return checkpoint_data['continuation_state']
+
+    def page_completed(self, page_number, continuation_state):
+        self._output_file.flush()
+        self._last_completed_page = {'pdf': self._pdf_fingerprint,
+                                     'page_number': page_number,
+                                     'offset': os.fstat(self._output_file.fileno()).st_size,
+                                     'continuation_state': continuation_state}
+        self._pages_since_save += 1
+        if self._pages_since_save >= self._interval:
+            self.save()
+
+    def save(self):
+        self._pages_since_save = 0
+        if not self._last_completed_page:
+            return
+        self._output_file.flush()
+        os.fsync(self._output_file.fileno())
+        temp_filename = self._filename + '.tmp'
+        save_continuation_state(temp_filename, self._last_completed_page)
+        os.replace(temp_filename, self._filename)
+
+    def _remove(self):
+        if os.path.exists(self._filename):
+            os.remove(self._filename)
+
+
+@contextmanager
+def open_checkpointed_output(filename, fieldnames):
+    # yields the output sink and its checkpoint (None for sinks that cannot be
+    # truncated); with `--resume` on the command line the existing output is
+    # appended to from the last checkpointed page
+    resume = RESUME_FLAG in sys.argv[1:]
+    with open_output_sink(filename, fieldnames, append=resume) as csv_writer:
+        yield csv_writer, PDFCheckpoint.for_output(csv_writer, resume)
+
+
+class PDFPageMetrics:
+    # records render time, string count, parse time and rows emitted for every
+    # page, and writes them to a .json or .csv report when the run ends; with
+    # `profile` set the run is also profiled with cProfile
+    def __init__(self, report_filename, profile=False):
+        self._report_filename = report_filename
+        self._profiler = cProfile.Profile() if profile else None
+        self._pages = []
+
+    @classmethod
+    def from_environment(cls):
+        report_filename = os.environ.get(METRICS_REPORT_ENVIRONMENT_VARIABLE)
+        if not report_filename:
+            return None
+        return cls(report_filename, profile=bool(os.environ.get(METRICS_PROFILE_ENVIRONMENT_VARIABLE)))
+
+    def __enter__(self):
+        if self._profiler:
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._profiler:
+            self._profiler.disable()
+        self.write_report()
+
+    def instrument(self, parse_page):
+        def instrumented_parse_page(page):
+            # a serial iterator renders the page here; parallel and pipelined
+            # ones already did, so the render time is the one the page reports
+            string_count = len(page.get_strings())
+            start_time = perf_counter()
+            rows = list(parse_page(page))
+            parse_time = perf_counter()
+            self._pages.append({'page_number': page.get_page_number(),
+                                'string_count': string_count,
+                                'render_seconds': round(page.get_render_seconds(), 6),
+                                'parse_seconds': round(parse_time - start_time, 6),
+                                'row_count': len(rows)})
+            return rows
+        return instrumented_parse_page
+
+    def write_report(self):
+        with open(self._report_filename, 'w', newline='') as f:
+            if self._report_filename.endswith('.json'):
+                json.dump(self._pages, f, indent=1)
+            else:
+                csv_writer = csv.DictWriter(f, METRICS_FIELDS)
+                csv_writer.writeheader()
+                csv_writer.writerows(self._pages)
+        slowest_pages = sorted(self._pages, key=lambda x: x['render_seconds'] + x['parse_seconds'], reverse=True)
+        for page in slowest_pages[:SLOWEST_PAGES_REPORTED]:
+            print(f'slow page {page["page_number"]}: render {page["render_seconds"]:.3f}s, '
+                  f'parse {page["parse_seconds"]:.3f}s, {page["row_count"]} rows')
+        if self._profiler:
+            self._profiler.dump_stats(self._report_filename + '.prof')
+            pstats.Stats(self._profiler).sort_stats('cumulative').print_stats(PROFILE_FUNCTIONS_REPORTED)
+
+
+def parse_pdf_pages_to_csv(pdf, csv_writer, parse_page, continuation_state=(), pipelined=False, checkpoint=None,
+                           metrics=None):
+    # `parse_page(page, continuation_state)` is a generator that yields the
+    # page's rows and returns the continuation state the next page starts from,
+    # e.g. a table header running over the page break; that state is what a
+    # checkpoint saves and restores, and the last one is returned
+    assert not (pipelined and checkpoint), 'checkpoints are only supported for serial conversions'
+    csv_writer = get_row_writer(csv_writer)
+    restored_continuation_state = checkpoint and checkpoint.restore(pdf)
+    if restored_continuation_state is None:
+        csv_writer.writeheader()
+    else:
+        continuation_state = restored_continuation_state
+
+    def parse_next_page(page):
+        nonlocal continuation_state
         print(f'processing page {page.get_page_number()}')
-        pdf_page_parser = pdf_page_parser_clazz(page, previous_table_header, previous_party)
-        for row in pdf_page_parser:
-            csv_writer.writerow(row._asdict())
-        previous_table_header = pdf_page_parser.get_continued_table_header()
-        previous_party = pdf_page_parser.get_continued_party()
+        continuation_state = yield from parse_page(page, continuation_state)
+
+    metrics = metrics or PDFPageMetrics.from_environment()
+    if metrics:
+        parse_next_page = metrics.instrument(parse_next_page)
+    if pipelined:
+        with metrics or nullcontext():
+            print(PDFPipeline(pdf, parse_next_page, csv_writer.writerows).run())
+    else:
+        with metrics or nullcontext(), checkpoint or nullcontext():
+            for page in pdf:
+                csv_writer.writerows(parse_next_page(page))
+                if checkpoint:
+                    checkpoint.page_completed(page.get_page_number(), continuation_state)
+    return continuation_state
+
+
+def pdf_to_csv(pdf, csv_writer, pdf_page_parser_clazz, continued_table_header=None, continued_party='',
+               pipelined=False, checkpoint=None, metrics=None):
+    def parse_page(page, continuation_state):
+        pdf_page_parser = pdf_page_parser_clazz(page, *continuation_state)
+        yield from pdf_page_parser
+        return pdf_page_parser.get_continued_table_header(), pdf_page_parser.get_continued_party()
+
+    return parse_pdf_pages_to_csv(pdf, csv_writer, parse_page, (continued_table_header, continued_party),
+                                  pipelined, checkpoint, metrics)
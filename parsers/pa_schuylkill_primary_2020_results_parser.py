@@ -1,6 +1,5 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
 from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
     ElectionwarePDFTableParser, ElectionwarePDFPageParser
 
@@ -48,6 +47,8 @@ OPENELECTIONS_MAPPED_HEADER = [
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 06/19/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+SKIPPED_OFFICES = ('Voter Turnout', 'Borough Of Mahanoy City Mahanoy City')
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'REPRESENTATIVE IN CONGRESS': ('U.S. House', 9),
@@ -75,6 +76,7 @@ class SchuylkillPDFTableParser(ElectionwarePDFTableParser):
     _expected_table_headers = EXPECTED_TABLE_HEADERS
     _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
     _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
+    _skipped_offices = SKIPPED_OFFICES
 
     def _verify_table_header(self):
         if self._office != 'STATISTICS':
@@ -93,14 +95,6 @@ class SchuylkillPDFTableParser(ElectionwarePDFTableParser):
         super()._clean_row(row)
         row['office'] = row['office'].title()
 
-    @classmethod
-    def _should_be_recorded(cls, row):
-        if not super()._should_be_recorded(row):
-            return False
-        if row['office'] == 'Borough Of Mahanoy City Mahanoy City':
-            return False
-        return True
-
 
 class SchuylkillPDFPageParser(ElectionwarePDFPageParser):
     _pdf_string_iterator_clazz = SchuylkillPDFStringIterator
@@ -108,8 +102,13 @@ class SchuylkillPDFPageParser(ElectionwarePDFPageParser):
     _header = SCHUYLKILL_HEADER
 
 
-if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
         pdf_to_csv(PDFPageIterator(SCHUYLKILL_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   SchuylkillPDFPageParser)
+                   csv_writer,
+                   SchuylkillPDFPageParser,
+                   checkpoint=checkpoint)
+
+
+if __name__ == "__main__":
+    convert()
@@ -1,6 +1,5 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
 from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
     ElectionwarePDFTableParser, ElectionwarePDFPageParser
 
@@ -92,8 +91,13 @@ class TiogaPDFPageParser(ElectionwarePDFPageParser):
             self._string_iterator = TiogaPDFStringIterator(strings)
 
 
-if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
         pdf_to_csv(PDFPageIterator(TIOGA_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   TiogaPDFPageParser)
+                   csv_writer,
+                   TiogaPDFPageParser,
+                   checkpoint=checkpoint)
+
+
+if __name__ == "__main__":
+    convert()
@@ -1,8 +1,7 @@
-import csv
 import os
-from parsers.pa_pdf_parser import PDFPageIterator
-from parsers.electionware_parser import pdf_to_csv, ElectionwarePDFStringIterator, \
-    ElectionwarePDFTableParser, ElectionwarePDFPageParser
+from parsers.pa_pdf_parser import PDFPageIterator, open_checkpointed_output
+from parsers.electionware_parser import pdf_to_csv, REQUIRED_VOTE_PERCENT, ElectionwareCountyProfile, \
+    compile_county_profile
 
 COUNTY = 'Washington'
 
@@ -48,6 +47,10 @@ OPENELECTIONS_MAPPED_HEADER = [
 FIRST_FOOTER_SUBSTRING = 'Precinct Summary - 06/23/2020'
 SECOND_FOOTER_SUBSTRING = 'Report generated with Electionware'
 
+# there's already a Write-In Totals field; this prevents double counting
+SKIPPED_CANDIDATE_PREFIXES = ('Write-In: ',)
+CANDIDATES_WITHOUT_VOTE_PERCENT = ('Contest Totals',)
+
 RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
     'PRESIDENT OF THE UNITED STATES': ('President', ''),
     'REPRESENTATIVE IN CONGRESS': ('U.S. House', 14),
@@ -62,51 +65,31 @@ RAW_OFFICE_TO_OFFICE_AND_DISTRICT = {
 }
 
 
-class WashingtonPDFStringIterator(ElectionwarePDFStringIterator):
-    _first_footer_substring = FIRST_FOOTER_SUBSTRING
-    _second_footer_substring = SECOND_FOOTER_SUBSTRING
-
-
-class WashingtonPDFTableParser(ElectionwarePDFTableParser):
-    _county = COUNTY
-    _expected_table_headers = EXPECTED_TABLE_HEADERS
-    _openelections_mapped_header = OPENELECTIONS_MAPPED_HEADER
-    _raw_office_to_office_and_district = RAW_OFFICE_TO_OFFICE_AND_DISTRICT
-
-    def _verify_table_header(self):
-        if self._office != 'STATISTICS':
-            vote_percent_header = next(self._string_iterator)
-            assert vote_percent_header == 'VOTE %'
-        super()._verify_table_header()
+WASHINGTON_PROFILE = ElectionwareCountyProfile(
+    county=COUNTY,
+    header=WASHINGTON_HEADER,
+    footer_substrings=(FIRST_FOOTER_SUBSTRING, SECOND_FOOTER_SUBSTRING),
+    expected_table_headers=EXPECTED_TABLE_HEADERS,
+    openelections_mapped_header=OPENELECTIONS_MAPPED_HEADER,
+    raw_office_to_office_and_district=RAW_OFFICE_TO_OFFICE_AND_DISTRICT,
+    title_case_offices=True,
+    title_case_candidates=True,
+    has_vote_percent_header=True,
+    trailing_vote_percent=REQUIRED_VOTE_PERCENT,
+    candidates_without_vote_percent=CANDIDATES_WITHOUT_VOTE_PERCENT,
+    skipped_candidate_prefixes=SKIPPED_CANDIDATE_PREFIXES,
+)
 
-    def _populate_votes(self, row):
-        super()._populate_votes(row)
-        if self._office != 'STATISTICS' and row['candidate'] != 'Contest Totals':
-            vote_percent_string = next(self._string_iterator)
-            assert '%' in vote_percent_string
+WashingtonPDFPageParser = compile_county_profile(WASHINGTON_PROFILE, __name__)
 
-    @classmethod
-    def _clean_row(cls, row):
-        super()._clean_row(row)
-        row['office'] = row['office'].title()
-        row['candidate'] = row['candidate'].title()
 
-    @classmethod
-    def _should_be_recorded(cls, row):
-        if row['candidate'].startswith('Write-In: '):
-            # there's already a Write-In Totals field; this prevents double counting
-            return False
-        return super()._should_be_recorded(row)
-
-
-class WashingtonPDFPageParser(ElectionwarePDFPageParser):
-    _pdf_string_iterator_clazz = WashingtonPDFStringIterator
-    _pdf_table_parser_clazz = WashingtonPDFTableParser
-    _header = WASHINGTON_HEADER
+def convert():
+    with open_checkpointed_output(OUTPUT_FILE, OUTPUT_HEADER) as (csv_writer, checkpoint):
+        pdf_to_csv(PDFPageIterator(WASHINGTON_FILE),
+                   csv_writer,
+                   WashingtonPDFPageParser,
+                   checkpoint=checkpoint)
 
 
 if __name__ == "__main__":
-    with open(OUTPUT_FILE, 'w', newline='') as f:
-        pdf_to_csv(PDFPageIterator(WASHINGTON_FILE),
-                   csv.DictWriter(f, OUTPUT_HEADER),
-                   WashingtonPDFPageParser)
+    convert()
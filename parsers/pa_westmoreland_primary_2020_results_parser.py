@@ -1,10 +1,13 @@
-from collections import defaultdict, namedtuple
+from collections import Counter, defaultdict, namedtuple
 from io import BytesIO
 from zipfile import ZipFile
-import clarify
+import argparse
+import hashlib
 import requests
-import csv
 import os
+from parsers.clarity_parser import ClarityDetailReader, ClarityJurisdiction, ClarityResult
+from parsers.clarity_polling import POLLING_INTERVAL_IN_SECONDS, ContestDeltaTracker, poll_clarity
+from parsers.output_sinks import open_output_sink
 
 
 CandidateData = namedtuple('CandidateData', 'precinct office district party candidate')
@@ -15,8 +18,11 @@ OUTPUT_HEADER = ['county', 'precinct', 'office', 'district', 'party', 'candidate
                  'election_day', 'mail_in', 'absentee', 'provisional', 'votes']
 
 CLARITY_ELECTIONS_PA_URL = 'https://results.enr.clarityelections.com/PA'
-WESTMORELAND_URL = f'{CLARITY_ELECTIONS_PA_URL}/{COUNTY}/103293/255115/reports/detailxml.zip'
+WESTMORELAND_ELECTION_URL = f'{CLARITY_ELECTIONS_PA_URL}/{COUNTY}/103293'
+WESTMORELAND_OFFICIAL_VERSION = '255115'
+WESTMORELAND_URL = f'{WESTMORELAND_ELECTION_URL}/{WESTMORELAND_OFFICIAL_VERSION}/reports/detailxml.zip'
 XML_FILENAME = 'detail.xml'
+DELTA_LOG_FILE = 'westmoreland_deltas.jsonl'
 
 CONTEST_TO_OPENELECTIONS_OFFICE_PARTY_AND_DISTRICT = {
     'PRESIDENTIAL ELECTORS': ('President', '', ''),
@@ -57,9 +63,9 @@ CLARITY_TO_OPENELECTIONS_VOTE_TYPE = {
 
 
 def should_be_recorded(result):
-    if not result.choice or not result.jurisdiction:
+    if not result.choice or not result.precinct:
         return False
-    if any(x in result.contest.text for x in ('COMMITTEE', 'DELEGATE')):
+    if any(x in result.contest for x in ('COMMITTEE', 'DELEGATE')):
         return False
     if result.vote_type == 'Federal':
         assert result.votes == 0
@@ -68,18 +74,18 @@ def should_be_recorded(result):
 
 
 def extract_office_party_and_district(result):
-    contest = result.contest.text
+    contest = result.contest
     if contest in CONTEST_TO_OPENELECTIONS_OFFICE_PARTY_AND_DISTRICT:
         return CONTEST_TO_OPENELECTIONS_OFFICE_PARTY_AND_DISTRICT[contest]
     return contest.title(), '', ''
 
 
 def extract_candidate_data(result):
-    precinct = result.jurisdiction.name
-    candidate = result.choice.text
+    precinct = result.precinct
+    candidate = result.choice
     office, party, district = extract_office_party_and_district(result)
-    assert not party or party == result.choice.party
-    party = party or result.choice.party
+    assert not party or party == result.party
+    party = party or result.party
     return CandidateData(precinct, office, district, party, candidate)
 
 
@@ -91,46 +97,122 @@ def process_result(result, candidate_data_to_votes):
     vote_data['votes'] = vote_data.get('votes', 0) + result.votes
 
 
-def candidate_level_data(parser):
-    candidate_data_to_votes = defaultdict(dict)
-    for result in parser.results:
-        if should_be_recorded(result):
-            process_result(result, candidate_data_to_votes)
+def candidate_level_data(candidate_data_to_votes):
     for candidate_data in candidate_data_to_votes:
         yield {'county': COUNTY,
                **candidate_data._asdict(),
                **candidate_data_to_votes[candidate_data]}
 
 
-def precinct_level_data(parser):
-    for jurisdiction in parser.result_jurisdictions:
-        yield {'county': COUNTY, 'precinct': jurisdiction.name,
-               'office': 'Ballots Cast', 'votes': jurisdiction.ballots_cast}
-        yield {'county': COUNTY, 'precinct': jurisdiction.name,
-               'office': 'Registered Voters', 'votes': jurisdiction.total_voters}
+def precinct_level_data(jurisdiction):
+    yield {'county': COUNTY, 'precinct': jurisdiction.name,
+           'office': 'Ballots Cast', 'votes': jurisdiction.ballots_cast}
+    yield {'county': COUNTY, 'precinct': jurisdiction.name,
+           'office': 'Registered Voters', 'votes': jurisdiction.total_voters}
 
 
-def get_westmoreland_xml_file():
-    response = requests.get(WESTMORELAND_URL, stream=True)
+def clarity_level_data(reader):
+    # every result of a choice is read before the next choice starts, so each
+    # candidate's rows are complete, and written, once the choice changes
+    candidate_data_to_votes = defaultdict(dict)
+    current_choice = None
+    for record in reader:
+        if isinstance(record, ClarityJurisdiction):
+            yield from precinct_level_data(record)
+            continue
+        if (record.contest, record.choice) != current_choice:
+            yield from candidate_level_data(candidate_data_to_votes)
+            candidate_data_to_votes.clear()
+            current_choice = (record.contest, record.choice)
+        if should_be_recorded(record):
+            process_result(record, candidate_data_to_votes)
+    yield from candidate_level_data(candidate_data_to_votes)
+
+
+def get_westmoreland_xml_file(url=WESTMORELAND_URL):
+    response = requests.get(url, stream=True)
     zipped_data = ZipFile(BytesIO(response.content))
     return zipped_data.open(XML_FILENAME)
 
 
-def clarity_to_csv(parser):
-    with open(OUTPUT_FILE, 'w', newline='') as f_out:
-        csv_writer = csv.DictWriter(f_out, OUTPUT_HEADER)
+def clarity_to_csv(reader):
+    with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
         csv_writer.writeheader()
-        for row in precinct_level_data(parser):
-            csv_writer.writerow(row)
-        for row in candidate_level_data(parser):
+        for row in clarity_level_data(reader):
             csv_writer.writerow(row)
 
 
+def group_contest_records(records):
+    # splits the stream into runs of one contest's records, with any precincts
+    # first named inside it; the turnout before the first contest is the run
+    # of contest None. Each run's rows do not depend on the other runs
+    contest = None
+    contest_records = []
+    for record in records:
+        if isinstance(record, ClarityResult) and record.contest != contest:
+            yield contest, contest_records
+            contest = record.contest
+            contest_records = []
+        contest_records.append(record)
+    yield contest, contest_records
+
+
+def hash_contest_records(contest_records):
+    contest_hash = hashlib.sha256()
+    for record in contest_records:
+        contest_hash.update(repr(record).encode())
+    return contest_hash.hexdigest()
+
+
+class WestmorelandLiveResults:
+    # election night polling: the detail.xml of each new version is streamed
+    # once and each contest's rows are kept between versions, so only the
+    # contests whose results differ from the previous version are rebuilt
+    # and written to the delta log; the csv is then rewritten in document order
+    def __init__(self, delta_log_filename=DELTA_LOG_FILE):
+        self._delta_tracker = ContestDeltaTracker(delta_log_filename)
+        self._contest_to_rows = {}
+
+    def refresh(self, version):
+        contest_to_digest = {}
+        contest_to_rows = {}
+        contest_counts = Counter()
+        turnout_rows = []
+        with get_westmoreland_xml_file(f'{WESTMORELAND_ELECTION_URL}/{version}/reports/detailxml.zip') as f_in:
+            for contest, contest_records in group_contest_records(ClarityDetailReader(f_in)):
+                if contest is None:
+                    turnout_rows = list(clarity_level_data(contest_records))
+                    continue
+                contest_counts[contest] += 1
+                if contest_counts[contest] > 1:
+                    # a repeated contest name is tracked as a separate contest
+                    contest = f'{contest} ({contest_counts[contest]})'
+                digest = hash_contest_records(contest_records)
+                contest_to_digest[contest] = digest
+                if self._delta_tracker.get_changed_contests({contest: digest}):
+                    contest_to_rows[contest] = list(clarity_level_data(contest_records))
+                else:
+                    contest_to_rows[contest] = self._contest_to_rows[contest]
+        with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
+            csv_writer.writeheader()
+            csv_writer.writerows(turnout_rows)
+            for rows in contest_to_rows.values():
+                csv_writer.writerows(rows)
+        self._contest_to_rows = contest_to_rows
+        self._delta_tracker.record(version, contest_to_digest)
+
+
 def main():
-    with get_westmoreland_xml_file() as f_in:
-        parser = clarify.Parser()
-        parser.parse(f_in)
-        clarity_to_csv(parser)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--poll', action='store_true', help='refresh whenever Clarity publishes a new version')
+    parser.add_argument('--interval', type=float, default=POLLING_INTERVAL_IN_SECONDS)
+    parser.add_argument('--delta-log', default=DELTA_LOG_FILE)
+    args, _ = parser.parse_known_args()  # leaves `--output-format` to the output sink
+    if args.poll:
+        poll_clarity(WESTMORELAND_ELECTION_URL, WestmorelandLiveResults(args.delta_log).refresh, args.interval)
+    else:
+        with get_westmoreland_xml_file() as f_in:
+            clarity_to_csv(ClarityDetailReader(f_in))
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
-import csv
 import os
 from pdfreader import SimplePDFViewer, PageDoesNotExist
+from parsers.output_sinks import open_output_sink
 
 COUNTY = 'York'
 
@@ -479,8 +479,7 @@ def pdf_to_csv():
     with open(YORK_FILE, 'rb') as f_in:
         york_pdf_iterator = YorkPDFStringIterator(f_in)
         york_string_parser = YorkPDFStringParser(york_pdf_iterator)
-        with open(OUTPUT_FILE, 'w', newline='') as f_out:
-            csv_writer = csv.DictWriter(f_out, OUTPUT_HEADER)
+        with open_output_sink(OUTPUT_FILE, OUTPUT_HEADER) as csv_writer:
             csv_writer.writeheader()
             for row in york_string_parser:
                 csv_writer.writerow(row)
@@ -0,0 +1,140 @@
+import sys
+from pdfreader import PageDoesNotExist, SimplePDFViewer
+
+try:
+    from pdfminer.pdfdevice import PDFDevice
+    from pdfminer.pdffont import PDFUnicodeNotDefined
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+except ImportError:
+    PDFDevice = object
+    PDFPage = None
+
+
+DEFAULT_PDF_BACKEND = 'pdfreader'
+
+
+class PDFBackend:
+    # walks a pdf one page at a time and renders each page to the ordered list
+    # of strings that the page parsers consume; out of range pages raise
+    # pdfreader's PageDoesNotExist regardless of the backend
+    name = None
+    available = True
+
+    def __init__(self, f):
+        self._f = f
+        self._page_number = 1
+
+    def navigate(self, page_number):
+        raise NotImplementedError
+
+    def next(self):
+        self.navigate(self._page_number + 1)
+
+    def render(self):
+        raise NotImplementedError
+
+    def release_page(self):
+        # drops the objects rendered for the current page
+        pass
+
+    def close(self):
+        self._f.close()
+
+
+class PdfreaderBackend(PDFBackend):
+    name = 'pdfreader'
+
+    def __init__(self, f):
+        super().__init__(f)
+        self._pdf_viewer = SimplePDFViewer(f)
+
+    def navigate(self, page_number):
+        self._pdf_viewer.navigate(page_number)
+        self._page_number = page_number
+
+    def next(self):
+        self._pdf_viewer.next()
+        self._page_number += 1
+
+    def render(self):
+        self._pdf_viewer.render()
+        return self._pdf_viewer.canvas.strings
+
+    def release_page(self):
+        self._pdf_viewer.canvas = type(self._pdf_viewer.canvas)()
+
+
+class TextOperationDevice(PDFDevice):
+    # collects one string per string operand of the page's text show
+    # operators, like pdfreader's canvas: a TJ array gives one per string
+    # element, and text drawn by form xobjects is left out
+    def __init__(self, resource_manager):
+        super().__init__(resource_manager)
+        self.strings = []
+        self._figure_depth = 0
+
+    def begin_figure(self, name, bbox, matrix):
+        self._figure_depth += 1
+
+    def end_figure(self, name):
+        self._figure_depth -= 1
+
+    def render_string(self, textstate, seq, ncs, graphicstate):
+        if self._figure_depth:
+            return
+        for obj in seq:
+            if isinstance(obj, bytes):
+                self.strings.append(''.join(self._decode_cid(textstate.font, cid)
+                                            for cid in textstate.font.decode(obj)))
+
+    @staticmethod
+    def _decode_cid(font, cid):
+        try:
+            return font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            # like pdfreader, a code missing from the font's maps is kept as its 00-FF character
+            return chr(cid)
+
+
+class PdfminerBackend(PDFBackend):
+    name = 'pdfminer'
+    available = PDFPage is not None
+
+    def __init__(self, f):
+        assert self.available, 'the pdfminer backend requires pdfminer.six'
+        super().__init__(f)
+        self._resource_manager = PDFResourceManager()
+        self._pdf_page = None
+        self._pdf_pages = None
+        self._next_page_number = None
+
+    def navigate(self, page_number):
+        # pages are read in a single pass over the pdf; only jumping elsewhere
+        # starts a new pass, which skips the earlier pages
+        if self._pdf_pages is None or page_number != self._next_page_number:
+            self._pdf_pages = PDFPage.get_pages(self._f, range(page_number - 1, sys.maxsize))
+        self._pdf_page = next(self._pdf_pages, None)
+        if self._pdf_page is None:
+            self._pdf_pages = None
+            raise PageDoesNotExist(page_number)
+        self._page_number = page_number
+        self._next_page_number = page_number + 1
+
+    def render(self):
+        if self._pdf_page is None:
+            self.navigate(self._page_number)
+        device = TextOperationDevice(self._resource_manager)
+        PDFPageInterpreter(self._resource_manager, device).process_page(self._pdf_page)
+        return device.strings
+
+    def release_page(self):
+        self._pdf_page = None
+
+
+PDF_BACKENDS = {backend.name: backend for backend in (PdfreaderBackend, PdfminerBackend)}
+AVAILABLE_PDF_BACKENDS = sorted(name for name, backend in PDF_BACKENDS.items() if backend.available)
+
+
+def open_pdf_backend(f, backend=DEFAULT_PDF_BACKEND):
+    return PDF_BACKENDS[backend](f)
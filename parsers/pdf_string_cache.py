@@ -0,0 +1,83 @@
+import gzip
+import hashlib
+import json
+import os
+
+
+# the cache is opt in, since it can take up to `PDF_STRING_CACHE_MAX_BYTES`
+# of disk; set PDF_STRING_CACHE to enable it
+PDF_STRING_CACHE_ENVIRONMENT_VARIABLE = 'PDF_STRING_CACHE'
+PDF_STRING_CACHE_DIR = os.environ.get(
+    'PDF_STRING_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'openelections-data-pa', 'pdf_strings'))
+PDF_STRING_CACHE_MAX_BYTES = 512 * 1024 * 1024
+PUTS_PER_EVICTION_CHECK = 64
+HASH_BLOCK_SIZE = 1024 * 1024
+CACHE_FILE_SUFFIX = '.json.gz'
+
+
+def hash_pdf_file(filename):
+    sha256 = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class PDFStringCache:
+    # stores the rendered `canvas.strings` of each page as gzipped json, keyed
+    # by the pdf's content hash and page number; least recently used pages are
+    # evicted once the cache grows past `max_bytes`
+    def __init__(self, cache_dir=PDF_STRING_CACHE_DIR, max_bytes=PDF_STRING_CACHE_MAX_BYTES):
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+        self._puts_since_eviction_check = 0
+
+    def get(self, pdf_hash, page_number):
+        path = self._page_path(pdf_hash, page_number)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                strings = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        return strings
+
+    def put(self, pdf_hash, page_number, strings):
+        path = self._page_path(pdf_hash, page_number)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump(strings, f, separators=(',', ':'))
+        os.replace(temp_path, path)
+        self._puts_since_eviction_check += 1
+        if self._puts_since_eviction_check >= PUTS_PER_EVICTION_CHECK:
+            self.evict()
+
+    def evict(self):
+        self._puts_since_eviction_check = 0
+        entries = list(self._iterate_cache_entries())
+        total_bytes = sum(entry.stat().st_size for entry in entries)
+        for entry in sorted(entries, key=lambda x: x.stat().st_mtime):
+            if total_bytes <= self._max_bytes:
+                break
+            total_bytes -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass  # already evicted by another process
+
+    def _iterate_cache_entries(self):
+        if not os.path.isdir(self._cache_dir):
+            return
+        for pdf_dir in os.scandir(self._cache_dir):
+            if pdf_dir.is_dir():
+                for entry in os.scandir(pdf_dir.path):
+                    if entry.name.endswith(CACHE_FILE_SUFFIX):
+                        yield entry
+
+    def _page_path(self, pdf_hash, page_number):
+        return os.path.join(self._cache_dir, pdf_hash, f'{page_number}{CACHE_FILE_SUFFIX}')
+
+
+PDF_STRING_CACHE = PDFStringCache() if os.environ.get(PDF_STRING_CACHE_ENVIRONMENT_VARIABLE) else None
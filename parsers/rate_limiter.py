@@ -0,0 +1,37 @@
+import asyncio
+from threading import Lock
+from time import monotonic, sleep
+
+
+class RateLimiter:
+    # spaces the start of successive requests by at least `interval_in_seconds`,
+    # however many threads share the limiter
+    def __init__(self, interval_in_seconds):
+        self._interval_in_seconds = interval_in_seconds
+        self._lock = Lock()
+        self._next_start_time = monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = monotonic()
+            start_time = max(now, self._next_start_time)
+            self._next_start_time = start_time + self._interval_in_seconds
+        sleep(start_time - now)
+
+
+class AsyncRateLimiter:
+    # asyncio counterpart of `RateLimiter`, for requests made from one event loop
+    def __init__(self, interval_in_seconds):
+        self._interval_in_seconds = interval_in_seconds
+        self._next_start_time = monotonic()
+
+    async def wait(self):
+        now = monotonic()
+        start_time = max(now, self._next_start_time)
+        self._next_start_time = start_time + self._interval_in_seconds
+        await asyncio.sleep(start_time - now)
+
+    def defer(self, delay_in_seconds):
+        # no request starts before `delay_in_seconds` from now, e.g. when the
+        # server answered with a `Retry-After` header
+        self._next_start_time = max(self._next_start_time, monotonic() + delay_in_seconds)